@@ -1612,10 +1612,10 @@ def fetches_cli(argv = sys.argv):
         arg = argv[i]
 
         if arg == '--region' or arg == '-R':
-            extent = str(argv[i + 1])
+            extent = argv[i + 1]
             i = i + 1
         elif arg[:2] == '-R':
-            extent = str(arg[2:])
+            extent = arg[2:]
         elif arg == '--list-only' or arg == '-l':
             want_list = True
         elif arg == '--filter' or arg == '-f':
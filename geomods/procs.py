@@ -485,10 +485,10 @@ def main():
         arg = argv[i]
 
         if arg == '--region' or arg == '-R':
-            i_region = str(argv[i + 1])
+            i_region = argv[i + 1]
             i = i + 1
         elif arg[:2] == '-R':
-            i_region = str(arg[2:])
+            i_region = arg[2:]
 
         elif arg == '--module' or arg == '-M':
             opts = argv[i + 1].split(':')
@@ -31,7 +31,7 @@
 ## see/set `_waffles_grid_info` dictionary to run a grid.
 ##
 ## Current DEM modules:
-## surface (GMT), triangulate (GMT/GDAL), nearneighbor (GMT/GDAL), mbgrid (MBSYSTEM), num (waffles), average (GDAL)
+## surface (GMT), triangulate (GMT/NUMPY), nearneighbor (GMT/GDAL/NUMPY), mbgrid (MBSYSTEM), num (waffles), average (GDAL)
 ##
 ## optionally, clip, filter, buffer the resulting DEM.
 ##
@@ -73,17 +73,22 @@
 import sys
 import os
 import io
-import time
+import re
 import glob
 import math
 import copy
+import itertools
+import functools
+import concurrent.futures
+import multiprocessing
 import shutil
+import mmap
 import subprocess
 ## ==============================================
 ## import gdal, etc.
 ## ==============================================
 import numpy as np
-import json
+import sqlite3
 import gdal
 import ogr
 import osr
@@ -156,6 +161,9 @@ def int_or(val, or_val = None):
         return(int(val))
     except: return(or_val)
 
+_float_re = re.compile(r'^\s*[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?\s*$')
+float_p = lambda val: _float_re.match(val) is not None
+
 def hav_dst(pnt0, pnt1):
     '''return the distance between pnt0 and pnt1,
     using the haversine formula.
@@ -172,13 +180,33 @@ def hav_dst(pnt0, pnt1):
     c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
     return(rad_m * c)
 
+## ==============================================
+## paths already found to exist (or be urls/fetches)
+## missing paths are not cached, they may be created later
+## ==============================================
+_path_exists_cache = set()
+
 def path_exists_or_url(src_str):
-    if os.path.exists(src_str): return(True)
-    if src_str[:4] == 'http': return(True)
-    if src_str.split(':')[0] in _known_datalist_fmts[400]: return(True)
+    if src_str in _path_exists_cache: return(True)
+    if os.path.exists(src_str) or src_str[:4] == 'http' or src_str.split(':')[0] in _known_datalist_fmts[400]:
+        _path_exists_cache.add(src_str)
+        return(True)
     echo_error_msg('invalid datafile/datalist: {}'.format(src_str))
     return(False)
 
+def file_readahead(src_fn):
+    '''ask the kernel to start reading `src_fn` into the page cache
+    in the background (posix_fadvise WILLNEED); does nothing where
+    posix_fadvise is not available.'''
+    
+    if hasattr(os, 'posix_fadvise'):
+        try:
+            fd = os.open(src_fn, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            finally: os.close(fd)
+        except: pass
+
 def _clean_zips(zip_files):
     '''remove all files\directories in `zip_files`'''
 
@@ -285,6 +313,13 @@ def err_scatter_plot(error_arr, dist_arr, dst_name = 'unc', xa = 'distance'):
     plt.savefig(out_png)
     plt.close()
 
+def err_subsample(err_arr, n = 50000000):
+    '''return err_arr if it has at most `n` rows, otherwise `n` rows
+    evenly spaced through it (rather than the first `n`)'''
+
+    if len(err_arr) <= n: return(err_arr)
+    return(err_arr[np.linspace(0, len(err_arr) - 1, n, dtype = np.int64)])
+
 def err2coeff(err_arr, coeff_guess = [0, 0.1, 0.2], dst_name = 'unc', xa = 'distance'):
     '''calculate and plot the error coefficient given err_arr which is 
     a 2 col array with `err dist`'''
@@ -428,13 +463,15 @@ def echo_error_msg2(msg, prefix = 'waffles'):
     sys.stderr.write('{}: error, {}\n'.format(prefix, msg))
 
 def echo_msg2(msg, prefix = 'waffles', nl = True):
-    '''echo `msg` to stderr using `prefix`
+    '''echo `msg` to stderr using `prefix`; `msg` may also be a list
+    of messages, which are each prefixed and written in one go.
     >> echo_msg2('message', 'test')
     test: message'''
     
     sys.stderr.write('\x1b[2K\r')
     sys.stderr.flush()
-    sys.stderr.write('{}: {}{}'.format(prefix, msg, '\n' if nl else ''))
+    msgs = msg if isinstance(msg, list) else [msg]
+    sys.stderr.write('{}{}'.format('\n'.join(['{}: {}'.format(prefix, m) for m in msgs]), '\n' if nl else ''))
 
 ## ==============================================
 ## echo message `m` to sys.stderr using
@@ -610,11 +647,18 @@ def region_chunk(region, inc, n_chunk = 10):
     n_chunk by n_chunk cell regions, given inc.
 
     returns a list of chunked regions.'''
+
+    return([x for x in region_yield_chunk(region, inc, n_chunk)])
+
+def region_yield_chunk(region, inc, n_chunk = 10):
+    '''chunk the region [xmin, xmax, ymin, ymax] into 
+    n_chunk by n_chunk cell regions, given inc.
+
+    yields each chunked region.'''
     
     i_chunk = 0
     x_i_chunk = 0
     x_chunk = n_chunk
-    o_chunks = []
     xcount, ycount, dst_gt = gdal_region2gt(region, inc)
     
     while True:
@@ -634,7 +678,7 @@ def region_chunk(region, inc, n_chunk = 10):
             if geo_y_o < region[2]: geo_y_o = region[2]
             if geo_x_t > region[1]: geo_x_t = region[1]
             if geo_x_o < region[0]: geo_x_o = region[0]
-            o_chunks.append([geo_x_o, geo_x_t, geo_y_o, geo_y_t])
+            yield([geo_x_o, geo_x_t, geo_y_o, geo_y_t])
         
             if y_chunk < ycount:
                 y_chunk += n_chunk
@@ -644,7 +688,6 @@ def region_chunk(region, inc, n_chunk = 10):
             x_chunk += n_chunk
             x_i_chunk += 1
         else: break
-    return(o_chunks)
 
 def regions_sort(trainers):
     '''sort regions by distance; regions is a list of regions [xmin, xmax, ymin, ymax].
@@ -967,8 +1010,9 @@ def gmt_sample_inc(src_grd, inc = 1, verbose = False):
 
     returns status code (0 == success)'''
     
-    out, status = run_cmd('gmt grdsample -I{:.10f} {} -R{} -Gtmp.tif=gd+n-9999:GTiff'.format(inc, src_grd, src_grd), verbose = verbose)
-    if status == 0: os.rename('tmp.tif', '{}'.format(src_grd))
+    tmp_grd = '{}_smp.tif'.format(os.path.splitext(src_grd)[0])
+    out, status = run_cmd('gmt grdsample -I{:.10f} {} -R{} -G{}=gd+n-9999:GTiff'.format(inc, src_grd, src_grd, tmp_grd), verbose = verbose)
+    if status == 0: os.rename(tmp_grd, '{}'.format(src_grd))
     return(status)
 
 ## ==============================================
@@ -1128,6 +1172,8 @@ def gdal_write (src_arr, dst_gdal, ds_config, dst_fmt = 'GTiff'):
         ds.SetGeoTransform(ds_config['geoT'])
         ds.SetProjection(ds_config['proj'])
         ds.GetRasterBand(1).SetNoDataValue(ds_config['ndv'])
+        if 'scale' in ds_config.keys(): ds.GetRasterBand(1).SetScale(ds_config['scale'])
+        if 'offset' in ds_config.keys(): ds.GetRasterBand(1).SetOffset(ds_config['offset'])
         ds.GetRasterBand(1).WriteArray(src_arr)
         ds = None
         return(dst_gdal, 0)
@@ -1206,9 +1252,9 @@ def gdal_query(src_xyz, src_grd, out_form):
 
             if x > ds_gt[0] and y < float(ds_gt[3]):
                 xpos, ypos = _geo2pixel(x, y, ds_gt)
-                try: 
+                if 0 <= ypos < ds_config['ny'] and 0 <= xpos < ds_config['nx']:
                     g = tgrid[ypos, xpos]
-                except: g = ds_nd
+                else: g = ds_nd
                 #print(g)
                 d = c = m = s = ds_nd
                 if g != ds_nd:
@@ -1222,6 +1268,42 @@ def gdal_query(src_xyz, src_grd, out_form):
         out_array = np.array(xyzl)
     return(out_array)
 
+def gdal_query_multi(src_xyz, src_grds):
+    '''query a list of gdal-compatible grid files with xyz data at once.
+    each grid is opened once and only the window covering the
+    points is read; points outside a grid or on its nodata are dropped.
+
+    returns a numpy array of [x, y, z, g0, g1, ...] (g<n> is the
+    value of grid <n> at x/y)'''
+
+    xyz = np.asarray(src_xyz, dtype = np.float64)
+    xyz = xyz[:,:3] if len(xyz) > 0 else np.empty((0, 3))
+    out_array = np.empty((len(xyz), 3 + len(src_grds)))
+    out_array[:,:3] = xyz
+    valid = np.ones(len(xyz), dtype = bool)
+    for i, src_grd in enumerate(src_grds):
+        ds = gdal.Open(src_grd)
+        if ds is None:
+            valid[:] = False
+            break
+        ds_config = gdal_gather_infos(ds)
+        xpos, ypos = _geo2pixel_arr(xyz[:,0], xyz[:,1], ds_config['geoT'])
+        valid &= (xpos >= 0) & (xpos < ds_config['nx']) & (ypos >= 0) & (ypos < ds_config['ny'])
+        if not valid.any():
+            ds = None
+            break
+        minc, maxc = xpos[valid].min(), xpos[valid].max()
+        minr, maxr = ypos[valid].min(), ypos[valid].max()
+        g_arr = ds.GetRasterBand(1).ReadAsArray(int(minc), int(minr), int(maxc - minc + 1), int(maxr - minr + 1))
+        ds = None
+        g = np.full(len(xyz), np.nan)
+        g[valid] = g_arr[ypos[valid] - minr, xpos[valid] - minc]
+        valid &= ~np.isnan(g)
+        if ds_config['ndv'] is not None: valid &= g != ds_config['ndv']
+        out_array[:,3 + i] = g
+        g_arr = g = None
+    return(out_array[valid])
+
 def gdal_yield_query(src_xyz, src_grd, out_form):
     '''query a gdal-compatible grid file with xyz data.
     out_form dictates return values
@@ -1255,9 +1337,9 @@ def gdal_yield_query(src_xyz, src_grd, out_form):
 
             if x > ds_gt[0] and y < float(ds_gt[3]):
                 xpos, ypos = _geo2pixel(x, y, ds_gt)
-                try: 
+                if 0 <= ypos < ds_config['ny'] and 0 <= xpos < ds_config['nx']:
                     g = tgrid[ypos, xpos]
-                except: g = ds_nd
+                else: g = ds_nd
                 d = c = m = s = ds_nd
                 if g != ds_nd:
                     d = z - g
@@ -1359,18 +1441,19 @@ def gdal_sum(src_gdal):
 
 def gdal_percentile(src_gdal, perc = 95):
     '''calculate the `perc` percentile of src_fn gdal file.
+    `perc` may be a list of percentiles, which are all calculated
+    from a single read of the grid.
 
-    return the calculated percentile'''
+    return the calculated percentile (or list of percentiles)'''
     
     ds = gdal.Open(src_gdal)
     if ds is not None:
-        ds_array = np.array(ds.GetRasterBand(1).ReadAsArray())
-        x_dim = ds_array.shape[0]
-        ds_array_flat = ds_array.flatten()
-        p = np.percentile(ds_array_flat, perc)
-        percentile = 2 if p < 2 else p
+        ds_array = ds.GetRasterBand(1).ReadAsArray()
+        p = np.percentile(ds_array, perc)
         ds = ds_array = None
-        return(percentile)
+        if isinstance(perc, (list, tuple)):
+            return([2 if x < 2 else x for x in p.tolist()])
+        else: return(2 if p < 2 else p)
     else: return(None)
 
 def gdal_mask_analysis(mask = None):
@@ -1469,6 +1552,35 @@ def gdal_ogr_regions(src_ds):
         poly = None
     return(these_regions)
 
+def gdal_ogr_regions_cached(src_ds, cache_dir = None):
+    '''return the region(s) of the ogr dataset (see gdal_ogr_regions)
+    the regions are cached as a pickle in `cache_dir` (~/.cache/waffles/regions
+    by default), keyed by the dataset path and modification time.
+    datasets which can't be stat'd (e.g. urls or /vsi paths) are not cached.'''
+
+    import hashlib
+    import pickle
+    try:
+        ds_mtime = os.stat(src_ds).st_mtime_ns
+    except OSError: return(gdal_ogr_regions(src_ds))
+    if cache_dir is None: cache_dir = os.path.join(os.path.expanduser('~'), '.cache', 'waffles', 'regions')
+    key = hashlib.blake2b('{}|{}'.format(os.path.abspath(src_ds), ds_mtime).encode('utf-8')).hexdigest()
+    cache_fn = os.path.join(cache_dir, '{}.pkl'.format(key))
+    try:
+        with open(cache_fn, 'rb') as c_fh:
+            return(pickle.load(c_fh))
+    except: pass
+    
+    these_regions = gdal_ogr_regions(src_ds)
+    if len(these_regions) > 0:
+        try:
+            os.makedirs(cache_dir, exist_ok = True)
+            with open('{}.{}'.format(cache_fn, os.getpid()), 'wb') as c_fh:
+                pickle.dump(these_regions, c_fh)
+            os.replace('{}.{}'.format(cache_fn, os.getpid()), cache_fn)
+        except: pass
+    return(these_regions)
+
 def gdal_create_polygon(coords):
     '''convert coords to Wkt
 
@@ -1554,6 +1666,34 @@ def _apply_gt(in_x, in_y, geoTransform):
     out_y = geoTransform[3] + (in_x + 0.5) * geoTransform[4] + (in_y + 0.5) * geoTransform[5]
     return(out_x, out_y)
 
+def _affine_apply(geoTransform, xs, ys, offset = .5):
+    '''apply geoTransform to the pixel locations `xs`, `ys` (numpy arrays or scalars);
+    `offset` is the location inside the cell (.5 is the cell center).
+    vectorized version of _pixel2geo.
+
+    returns [geo_xs, geo_ys]'''
+
+    xs = np.asarray(xs, dtype = np.float64) + offset
+    ys = np.asarray(ys, dtype = np.float64) + offset
+    geo_xs = geoTransform[0] + xs * geoTransform[1] + ys * geoTransform[2]
+    geo_ys = geoTransform[3] + xs * geoTransform[4] + ys * geoTransform[5]
+    return(geo_xs, geo_ys)
+
+def _geo2pixel_arr(geo_xs, geo_ys, geoTransform):
+    '''convert numpy arrays of geographic x,y values to pixel locations of geoTransform.
+    vectorized version of _geo2pixel.
+
+    returns [pixel_xs, pixel_ys] as integer arrays'''
+
+    if geoTransform[2] + geoTransform[4] == 0:
+        pixel_xs = ((geo_xs - geoTransform[0]) / geoTransform[1]) + .5
+        pixel_ys = ((geo_ys - geoTransform[3]) / geoTransform[5]) + .5
+    else:
+        pixel_xs, pixel_ys = _affine_apply(_invert_gt(geoTransform), geo_xs, geo_ys, 0)
+        pixel_xs += .5
+        pixel_ys += .5
+    return(pixel_xs.astype(np.int64), pixel_ys.astype(np.int64))
+
 def _invert_gt(geoTransform):
     '''invert the geotransform'''
     
@@ -1564,7 +1704,7 @@ def _invert_gt(geoTransform):
     outGeoTransform[1] = geoTransform[5] * invDet
     outGeoTransform[4] = -geoTransform[4] * invDet
     outGeoTransform[2] = -geoTransform[2] * invDet
-    outGeoTransfrom[5] = geoTransform[1] * invDet
+    outGeoTransform[5] = geoTransform[1] * invDet
     outGeoTransform[0] = (geoTransform[2] * geoTransform[3] - geoTransform[0] * geoTransform[5]) * invDet
     outGeoTransform[3] = (-geoTransform[1] * geoTransform[3] + geoTransform[0] * geoTransform[4]) * invDet
     return(outGeoTransform)
@@ -1615,6 +1755,41 @@ def xyz2gdal_ds(src_xyz, dst_ogr):
         layer.CreateFeature(f)
     return(ds)
 
+def xyz2gdal_vsimem(src_xyz, dst_ogr):
+    '''Make a point vector OGR VRT from src_xyz, backed by a csv
+    written in numpy batches to GDAL's in-memory /vsimem/ filesystem.
+    gdal.Unlink both paths when done.
+
+    returns the /vsimem/ paths of the vrt and the csv'''
+
+    vsi_csv = '/vsimem/{}.csv'.format(dst_ogr)
+    vsi_vrt = '/vsimem/{}.vrt'.format(dst_ogr)
+    fp = gdal.VSIFOpenL(vsi_csv, 'wb')
+    l = b'x,y,z\n'
+    gdal.VSIFWriteL(l, 1, len(l), fp)
+    for xyz_arr in xyz_np_batches(src_xyz):
+        l = (('%.8f,%.8f,%.10f\n' * xyz_arr.shape[0]) % tuple(xyz_arr.ravel().tolist())).encode('utf-8')
+        gdal.VSIFWriteL(l, 1, len(l), fp)
+    gdal.VSIFCloseL(fp)
+    vrt = '<OGRVRTDataSource><OGRVRTLayer name="{}"><SrcDataSource>{}</SrcDataSource>\
+<GeometryType>wkbPoint25D</GeometryType><GeometryField encoding="PointFromColumns" x="x" y="y" z="z"/>\
+</OGRVRTLayer></OGRVRTDataSource>'.format(dst_ogr, vsi_csv)
+    gdal.FileFromMemBuffer(vsi_vrt, vrt)
+    return(vsi_vrt, vsi_csv)
+
+def xyz_np_batches(src_xyz, batch = 65536, cols = 3):
+    '''group the xyz data from `src_xyz` into numpy arrays
+    of at most `batch` points (only the first `cols` columns,
+    x, y and z by default, are kept).
+
+    yields numpy arrays of shape (n, cols)'''
+
+    src_xyz = iter(src_xyz)
+    while True:
+        xyzs = [xyz[:cols] for xyz in itertools.islice(src_xyz, batch)]
+        if len(xyzs) == 0: break
+        yield(np.array(xyzs, dtype = np.float64))
+    
 def gdal_xyz2gdal(src_xyz, dst_gdal, region, inc, dst_format = 'GTiff', mode = 'n', epsg = 4326, verbose = False):
     '''Create a GDAL supported grid from xyz data 
     `mode` of `n` generates a num grid
@@ -1633,19 +1808,17 @@ def gdal_xyz2gdal(src_xyz, dst_gdal, region, inc, dst_format = 'GTiff', mode = '
     #else: gdt = gdal.GDT_Int32
     ptArray = np.zeros((ycount, xcount))
     ds_config = gdal_set_infos(xcount, ycount, xcount * ycount, dst_gt, gdal_sr_wkt(epsg), gdt, -9999, dst_format)
-    for this_xyz in src_xyz:
-        x = this_xyz[0]
-        y = this_xyz[1]
-        z = this_xyz[2]
-        if x > region[0] and x < region[1]:
-            if y > region[2] and y < region[3]:
-                xpos, ypos = _geo2pixel(x, y, dst_gt)
-                try:
-                    if mode == 'm':
-                        sumArray[ypos, xpos] += z
-                    if mode == 'n' or mode == 'm': ptArray[ypos, xpos] += 1
-                    else: ptArray[ypos, xpos] = 1
-                except: pass
+    for xyz_arr in xyz_np_batches(src_xyz):
+        xyz_arr = xyz_arr[(xyz_arr[:,0] > region[0]) & (xyz_arr[:,0] < region[1]) & \
+                          (xyz_arr[:,1] > region[2]) & (xyz_arr[:,1] < region[3])]
+        xpos, ypos = _geo2pixel_arr(xyz_arr[:,0], xyz_arr[:,1], dst_gt)
+        in_grid = (xpos >= 0) & (xpos < xcount) & (ypos >= 0) & (ypos < ycount)
+        xpos = xpos[in_grid]
+        ypos = ypos[in_grid]
+        if mode == 'm': np.add.at(sumArray, (ypos, xpos), xyz_arr[in_grid,2])
+        if mode == 'n' or mode == 'm': np.add.at(ptArray, (ypos, xpos), 1)
+        else: ptArray[ypos, xpos] = 1
+        xyz_arr = None
     if mode == 'm':
         ptArray[ptArray == 0] = np.nan
         outarray = sumArray / ptArray
@@ -1663,98 +1836,187 @@ def gdal_xyz_mask(src_xyz, dst_gdal, region, inc, dst_format='GTiff', epsg = 432
     xcount, ycount, dst_gt = gdal_region2gt(region, inc)
     ptArray = np.zeros((ycount, xcount))
     ds_config = gdal_set_infos(xcount, ycount, xcount * ycount, dst_gt, gdal_sr_wkt(epsg), gdal.GDT_Int32, -9999, 'GTiff')
-    for this_xyz in src_xyz:
-        yield(this_xyz)
-        x = this_xyz[0]
-        y = this_xyz[1]
-        if x > region[0] and x < region[1]:
-            if y > region[2] and y < region[3]:
-                xpos, ypos = _geo2pixel(x, y, dst_gt)
-                try:
-                    ptArray[ypos, xpos] = 1
-                except: pass
+
+    ## ==============================================
+    ## mask a batch of points at a time, then pass
+    ## the same batch on downstream
+    ## ==============================================
+    src_xyz = iter(src_xyz)
+    while True:
+        xyzs = list(itertools.islice(src_xyz, 65536))
+        if len(xyzs) == 0: break
+        xys = np.array([xyz[:2] for xyz in xyzs], dtype = np.float64)
+        in_region = (xys[:,0] > region[0]) & (xys[:,0] < region[1]) & (xys[:,1] > region[2]) & (xys[:,1] < region[3])
+        xpos, ypos = _geo2pixel_arr(xys[in_region,0], xys[in_region,1], dst_gt)
+        in_grid = (xpos >= 0) & (xpos < xcount) & (ypos >= 0) & (ypos < ycount)
+        ptArray[ypos[in_grid], xpos[in_grid]] = 1
+        xys = xpos = ypos = in_region = in_grid = None
+        for this_xyz in xyzs:
+            yield(this_xyz)
     out, status = gdal_write(ptArray, dst_gdal, ds_config)
 
 def np_gaussian_blur(in_array, size):
-    '''blur an array using fftconvolve from scipy.signal
+    '''blur an array using gaussian_filter from scipy.ndimage
     size is the blurring scale-factor.
 
+    the kernel is exp(-(x**2 + y**2) / size) truncated at `size` cells,
+    edges are handled with `reflect` (same as np.pad 'symmetric'), so
+    no padded copy of the array is needed.
+
     returns the blurred array'''
-    
-    from scipy.signal import fftconvolve
-    from scipy.signal import convolve
-    import scipy.fftpack._fftpack as sff
-    padded_array = np.pad(in_array, size, 'symmetric')
-    x, y = np.mgrid[-size:size + 1, -size:size + 1]
-    g = np.exp(-(x**2 / float(size) + y**2 / float(size)))
-    g = (g / g.sum()).astype(in_array.dtype)
-    in_array = None
-    #try:
-    out_array = fftconvolve(padded_array, g, mode = 'valid')
-    #except:
-    #print('switching to convolve')
-    #out_array = convolve(padded_array, g, mode = 'valid')
+
+    from scipy.ndimage import gaussian_filter
+    if size < 1: return(in_array)
+    sigma = math.sqrt(size / 2.)
+    out_array = gaussian_filter(in_array, sigma, mode = 'reflect', truncate = size / sigma)
     return(out_array)
 
+def np_blur_nodata(src_arr, sf = 1, nd_msk = None, ndv = -9999):
+    '''gaussian blur `src_arr` using a smooth-factor of `sf`, ignoring nodata.
+    `nd_msk` is a boolean array of the nodata cells (defaults to src_arr == ndv);
+    nodata cells are blurred as zero and reset to `ndv` afterwards.
+    note: src_arr is modified in place.
+
+    returns [blurred array, nodata mask]'''
+
+    if nd_msk is None: nd_msk = src_arr == ndv
+    src_arr[nd_msk] = 0
+    smooth_arr = np_gaussian_blur(src_arr, int(sf))
+    smooth_arr[nd_msk] = ndv
+    return(smooth_arr, nd_msk)
+
 def gdal_blur(src_gdal, dst_gdal, sf = 1):
     '''gaussian blur on src_gdal using a smooth-factor of `sf`
-    runs np_gaussian_blur(ds.Array, sf)'''
+    runs np_blur_nodata(ds.Array, sf)
+
+    rasters larger than 2GB are read into a temporary numpy.memmap'''
     
     ds = gdal.Open(src_gdal)
     if ds is not None:
         ds_config = gdal_gather_infos(ds)
-        ds_array = ds.GetRasterBand(1).ReadAsArray(0, 0, ds_config['nx'], ds_config['ny'])
+        ds_array, mm_fn = gdal_read_array(ds, ds_config)
         ds = None
-        msk_array = np.array(ds_array)
-        msk_array[msk_array != ds_config['ndv']] = 1
-        msk_array[msk_array == ds_config['ndv']] = np.nan
-        ds_array[ds_array == ds_config['ndv']] = 0
-        smooth_array = np_gaussian_blur(ds_array, int(sf))
-        smooth_array = smooth_array * msk_array
-        mask_array = ds_array = None
-        smooth_array[np.isnan(smooth_array)] = ds_config['ndv']
+        smooth_array, msk_array = np_blur_nodata(ds_array, sf, ndv = ds_config['ndv'])
+        ds_array = msk_array = None
+        if mm_fn is not None: remove_glob(mm_fn)
         return(gdal_write(smooth_array, dst_gdal, ds_config))
     else: return([], -1)
 
+def gdal_read_array(src_ds, ds_config = None, mm_limit = 2147483648):
+    '''read the first band of `src_ds` into a numpy array.
+    if the band is larger than `mm_limit` bytes, read it into
+    a temporary numpy.memmap file instead of memory.
+
+    returns [array, memmap-filename or None]'''
+
+    import gdal_array
+    import tempfile
+    if ds_config is None: ds_config = gdal_gather_infos(src_ds)
+    band = src_ds.GetRasterBand(1)
+    np_dt = np.dtype(gdal_array.GDALTypeCodeToNumericTypeCode(ds_config['dt']))
+    if ds_config['nx'] * ds_config['ny'] * np_dt.itemsize > mm_limit:
+        mm_fd, mm_fn = tempfile.mkstemp(suffix = '.mmap', dir = '.')
+        os.close(mm_fd)
+        ds_array = np.memmap(mm_fn, dtype = np_dt, mode = 'w+', shape = (ds_config['ny'], ds_config['nx']))
+        band.ReadAsArray(0, 0, ds_config['nx'], ds_config['ny'], buf_obj = ds_array)
+    else:
+        mm_fn = None
+        ds_array = band.ReadAsArray(0, 0, ds_config['nx'], ds_config['ny'])
+    band = None
+    return(ds_array, mm_fn)
+
+def gdal_coeff_apply(src_gdal, dst_gdal, pw = 1, mul = 1, dtype = 'float32'):
+    '''apply an error coefficient to `src_gdal`: abs(src) ** `pw` * `mul`
+    nodata cells are treated as zero (as in `gmt grdmath src 0 AND ...`)
+    if `dtype` is 'int16' the output is quantised to int16 over its
+    range, with the band scale/offset set to recover the values.
+
+    returns [output-gdal, status-code]'''
+
+    ds = gdal.Open(src_gdal)
+    if ds is None: return(None, -1)
+    ds_config = gdal_gather_infos(ds)
+    ds_array = ds.GetRasterBand(1).ReadAsArray().astype(np.float32)
+    ds = None
+    ds_array[(ds_array == ds_config['ndv']) | np.isnan(ds_array)] = 0
+    np.abs(ds_array, out = ds_array)
+    np.power(ds_array, pw, out = ds_array)
+    np.multiply(ds_array, mul, out = ds_array)
+    if dtype == 'int16':
+        lo, hi = float(np.min(ds_array)), float(np.max(ds_array))
+        scale = (hi - lo) / 65534. if hi > lo else 1.
+        ds_config['scale'] = scale
+        ds_config['offset'] = lo + 32767 * scale
+        ds_array = (np.rint((ds_array - lo) / scale) - 32767).astype(np.int16)
+        ds_config['dt'] = gdal.GDT_Int16
+        ds_config['ndv'] = -32768
+    else:
+        ds_config['dt'] = gdal.GDT_Float32
+        ds_config['ndv'] = -9999
+    return(gdal_write(ds_array, dst_gdal, ds_config))
+
 def gdal_smooth(src_gdal, dst_gdal, fltr = 10, split_value = None, use_gmt = False):
     '''smooth `src_gdal` using smoothing factor `fltr`; optionally
     only smooth bathymetry (sub-zero)
 
+    the source grid is read once; the split, nodata mask and merge
+    are all done on that array.
+
     return 0 for success or -1 for failure'''
     
-    if os.path.exists(src_gdal):
+    if not os.path.exists(src_gdal): return(-1)
+    ds = gdal.Open(src_gdal)
+    if ds is None: return(-1)
+    ds_config = gdal_gather_infos(ds)
+    ds_array, mm_fn = gdal_read_array(ds, ds_config)
+    ds = None
+    ndv = ds_config['ndv']
+    msk_array = ds_array == ndv
+
+    ## ==============================================
+    ## `l_msk` masks the cells that are not smoothed
+    ## ==============================================
+    if split_value is not None:
+        try:
+            sv = int(split_value)
+        except: sv = 0
+        l_msk = msk_array | (ds_array >= sv)
+    else: l_msk = msk_array
+
+    if use_gmt:
         if split_value is not None:
-            dem_u, dem_l = gdal_split(src_gdal, split_value)
+            dem_l = '{}_l.tif'.format(os.path.basename(src_gdal).split('.')[0])
+            gdal_write(np.where(l_msk, ndv, ds_array), dem_l, ds_config)
         else: dem_l = src_gdal
-        if use_gmt:
-            out, status = gmt_grdfilter(dem_l, 'tmp_fltr.tif=gd+n-9999:GTiff', dist = fltr, verbose = True)
-        else: out, status = gdal_blur(dem_l, 'tmp_fltr.tif', fltr)
-        if split_value is not None:
-            ds = gdal.Open(src_gdal)
-            ds_config = gdal_gather_infos(ds)
-            msk_arr = ds.GetRasterBand(1).ReadAsArray()
-            msk_arr[msk_arr != ds_config['ndv']] = 1
-            msk_arr[msk_arr == ds_config['ndv']] = np.nan
-            ds = None
-            u_ds = gdal.Open(dem_u)
-            if u_ds is not None:
-                l_ds = gdal.Open('tmp_fltr.tif')
-                if l_ds is not None:
-                    u_arr = u_ds.GetRasterBand(1).ReadAsArray()
-                    l_arr = l_ds.GetRasterBand(1).ReadAsArray()
-                    u_arr[u_arr == ds_config['ndv']] = 0
-                    l_arr[l_arr == ds_config['ndv']] = 0
-                    ds_arr = (u_arr + l_arr) * msk_arr
-                    ds_arr[np.isnan(ds_arr)] = ds_config['ndv']
-                    gdal_write(ds_arr, 'merged.tif', ds_config)
-                    l_ds = None
-                    remove_glob(dem_l)
-                u_ds = None
-                remove_glob(dem_u)
-            os.rename('merged.tif', 'tmp_fltr.tif')
-        os.rename('tmp_fltr.tif', dst_gdal)
-        return(0)
-    else: return(-1)
+        tmp_fltr = '{}_fltr.tif'.format(os.path.splitext(dst_gdal)[0])
+        out, status = gmt_grdfilter(dem_l, '{}=gd+n-9999:GTiff'.format(tmp_fltr), dist = fltr, verbose = True)
+        if dem_l != src_gdal: remove_glob(dem_l)
+        if split_value is None:
+            ds_array = None
+            if mm_fn is not None: remove_glob(mm_fn)
+            os.rename(tmp_fltr, dst_gdal)
+            return(0)
+        l_ds = gdal.Open(tmp_fltr)
+        l_arr = l_ds.GetRasterBand(1).ReadAsArray()
+        l_ds = None
+        remove_glob(tmp_fltr)
+        l_arr[l_arr == ndv] = 0
+    else:
+        l_arr, l_msk = np_blur_nodata(np.where(l_msk, 0, ds_array), fltr, l_msk, 0)
+
+    ## ==============================================
+    ## merge the un-smoothed (upper) data back into
+    ## the smoothed buffer and reset the nodata
+    ## ==============================================
+    if split_value is not None:
+        u_sel = ~msk_array & (ds_array > sv)
+        l_arr[u_sel] = ds_array[u_sel]
+        u_sel = None
+    l_arr[msk_array] = ndv
+    ds_array = msk_array = l_msk = None
+    if mm_fn is not None: remove_glob(mm_fn)
+    out, status = gdal_write(l_arr, dst_gdal, ds_config)
+    return(0 if status == 0 else -1)
 
 def gdal_sample_inc(src_grd, inc = 1, verbose = False):
     '''resamele src_grd to toggle between grid-node and pixel-node grid registration.'''
@@ -1789,9 +2051,17 @@ def gdal_chunks(src_fn, n_chunk = 10):
         src_ds = gdal.Open(src_fn)
     except: src_ds = None
     if src_ds is not None:
+        import gdal_array
         ds_config = gdal_gather_infos(src_ds)
         band = src_ds.GetRasterBand(1)
         gt = ds_config['geoT']
+        
+        ## ==============================================
+        ## a single read buffer is re-used for every chunk;
+        ## edge chunks read into a view of it.
+        ## ==============================================
+        chunk_buf = np.empty((min(n_chunk, ds_config['ny']), min(n_chunk, ds_config['nx'])),
+                             dtype = gdal_array.GDALTypeCodeToNumericTypeCode(ds_config['dt']))
 
         while True:
             y_chunk = n_chunk
@@ -1816,8 +2086,17 @@ def gdal_chunks(src_fn, n_chunk = 10):
                 this_geo_x_origin, this_geo_y_origin = _pixel2geo(this_x_origin, this_y_origin, gt)
                 dst_gt = [this_geo_x_origin, float(gt[1]), 0.0, this_geo_y_origin, 0.0, float(gt[5])]
                 
-                band_data = band.ReadAsArray(srcwin[0], srcwin[1], srcwin[2], srcwin[3])
-                if not np.all(band_data == band_data[0,:]):
+                band_data = band.ReadAsArray(srcwin[0], srcwin[1], srcwin[2], srcwin[3], buf_obj = chunk_buf[:srcwin[3],:srcwin[2]])
+
+                ## ==============================================
+                ## skip uniform (e.g. all nodata) chunks; most
+                ## chunks differ at a corner so check those first
+                ## ==============================================
+                first = band_data[0,0]
+                if band_data[0,-1] != first or band_data[-1,0] != first or band_data[-1,-1] != first:
+                    uniform = False
+                else: uniform = not np.any(band_data != first)
+                if not uniform:
                     o_chunk = '{}_chnk{}x{}.tif'.format(os.path.basename(src_fn).split('.')[0], x_i_chunk, i_chunk)
                     dst_fn = os.path.join(os.path.dirname(src_fn), o_chunk)
                     o_chunks.append(dst_fn)
@@ -1840,7 +2119,7 @@ def gdal_chunks(src_fn, n_chunk = 10):
             else:
                 x_chunk += n_chunk
                 x_i_chunk += 1
-        src_ds = None
+        src_ds = chunk_buf = None
         return(o_chunks)
     else: return(None)
 
@@ -1908,12 +2187,35 @@ def inf_entry(src_entry, overwrite = False):
     if not region_valid_p(minmax): minmax = None
     return(minmax)
 
+## ==============================================
+## the entry regions read by inf_entry_cached,
+## keyed on the entry [path, format]
+## ==============================================
+_inf_entry_cache = {}
+
+def inf_entry_cached(src_entry, overwrite = False):
+    '''return the region of the datalist entry as in inf_entry, but only
+    read/generate each entry's inf once per session; for use in the
+    datalist pass_h region filters, which revisit the same entries.
+    if `overwrite` is True, the inf is regenerated and the cached
+    region replaced.
+
+    returns the region of the inf file.'''
+
+    key = (src_entry[0], src_entry[1])
+    if overwrite or key not in _inf_entry_cache.keys():
+        minmax = inf_entry([src_entry[0], src_entry[1]], overwrite)
+        _inf_entry_cache[key] = tuple(minmax) if minmax is not None else None
+    minmax = _inf_entry_cache[key]
+    return(list(minmax) if minmax is not None else None)
+
 ## ==============================================
 ## gdal processing (datalist fmt:200)
 ## ==============================================
 def gdal_parse(src_ds, dump_nodata = False, srcwin = None, mask = None, warp = None, verbose = False, z_region = None):
     '''send the data from gdal file src_gdal to dst_xyz port (first band only)
-    optionally mask the output with `mask` or transform the coordinates to `warp` (epsg-code)'''
+    optionally mask the output with `mask` (a filename or an open gdal dataset) 
+    or transform the coordinates to `warp` (epsg-code)'''
 
     #if verbose: sys.stderr.write('waffles: parsing gdal file {}...'.format(src_ds.GetDescription()))
     ln = 1
@@ -1936,12 +2238,11 @@ def gdal_parse(src_ds, dump_nodata = False, srcwin = None, mask = None, warp = N
     gt = ds_config['geoT']
     msk_band = None
     if mask is not None:
-        src_mask = gdal.Open(mask)
+        src_mask = gdal.Open(mask) if isinstance(mask, str) else mask
         msk_band = src_mask.GetRasterBand(1)
     if srcwin is None: srcwin = (0, 0, ds_config['nx'], ds_config['ny'])
-    nodata = ['{:g}'.format(-9999), 'nan', float('nan')]
-    if band.GetNoDataValue() is not None: nodata.append('{:g}'.format(band.GetNoDataValue()))
-    if dump_nodata: nodata = []
+    ndv = band.GetNoDataValue()
+    if ndv is None: ndv = -9999
     for y in range(srcwin[1], srcwin[1] + srcwin[3], 1):
         band_data = band.ReadAsArray(srcwin[0], y, srcwin[2], 1)
         if z_region is not None:
@@ -1954,19 +2255,19 @@ def gdal_parse(src_ds, dump_nodata = False, srcwin = None, mask = None, warp = N
             band_data[msk_data==0]=-9999
             #msk_data = None
         band_data = np.reshape(band_data, (srcwin[2], ))
-        for x_i in range(0, srcwin[2], 1):
-            x = x_i + srcwin[0]
-            z = band_data[x_i]
-            if '{:g}'.format(z) not in nodata:
-                ln += 1
-                geo_x,geo_y = _pixel2geo(x, y, gt)
-                if warp is not None:
-                    point = ogr.CreateGeometryFromWkt('POINT ({} {})'.format(geo_x, geo_y))
-                    point.Transform(dst_trans)
-                    pnt = point.GetPoint()
-                    line = [pnt[0], pnt[1], z]
-                else: line = [geo_x, geo_y, z]
-                yield(line)
+        if dump_nodata:
+            x_is = np.arange(0, srcwin[2], 1)
+        else: x_is = np.flatnonzero(~np.isnan(band_data) & (band_data != -9999) & (band_data != ndv))
+        geo_xs, geo_ys = _affine_apply(gt, x_is + srcwin[0], np.full(len(x_is), y))
+        for geo_x, geo_y, z in zip(geo_xs.tolist(), geo_ys.tolist(), band_data[x_is]):
+            ln += 1
+            if warp is not None:
+                point = ogr.CreateGeometryFromWkt('POINT ({} {})'.format(geo_x, geo_y))
+                point.Transform(dst_trans)
+                pnt = point.GetPoint()
+                line = [pnt[0], pnt[1], z]
+            else: line = [geo_x, geo_y, z]
+            yield(line)
     band = None
     src_mask = None
     msk_band = None
@@ -2031,6 +2332,7 @@ def gdal2xyz_chunks(src_fn, chunk_value = 1000, inc  = None, epsg = None, vdatum
     if verbose: echo_msg('generated {} chunks from {}'.format(len(chunks), src_gdal))
     if src_gdal != src_fn: remove_glob(src_gdal)
 
+    vdc = None
     if vdatum is not None:
         vds = vdatum.split(',')
         if len(vds) < 2:
@@ -2039,7 +2341,7 @@ def gdal2xyz_chunks(src_fn, chunk_value = 1000, inc  = None, epsg = None, vdatum
         else:
             iv = vds[0]
             ov = vds[1]
-            vdc = _vd_config
+            vdc = dict(_vd_config)
             if vdc['jar'] is None: vdc['jar'] = vdatum_locate_jar()[0]
             vdc['ivert'] = iv
             vdc['overt'] = ov
@@ -2050,38 +2352,67 @@ def gdal2xyz_chunks(src_fn, chunk_value = 1000, inc  = None, epsg = None, vdatum
     if datalist is not None:
         datalist = os.path.join('xyz', datalist)
         
-    for i,chunk in enumerate(chunks):
-        echo_msg('* processing chunk {} [{}/{}]...'.format(chunk, i+1, len(chunks)))
-        xyz_chunk = '{}.xyz'.format(chunk.split('.')[0])
-        xyz_chunk_final = os.path.join('xyz', os.path.basename(xyz_chunk))
-
-        if epsg is not None or inc is not None:
-            tif_chunk = '{}_warp.tif'.format(chunk.split('.')[0])
-            gdw = 'gdalwarp {} -dstnodata -9999 -overwrite {}'.format(chunk, tif_chunk)
-            if epsg is not None: gdw += ' -t_srs EPSG:{}'.format(epsg)
-            if inc is not None: gdw += ' -tr {} {}'.format(inc, inc)
-            out, status = run_cmd(gdw, verbose = verbose)
-            remove_glob(chunk)
-        else: tif_chunk = chunk
-
-        with open(xyz_chunk, 'w') as xyz_c:
-            gdal_dump_entry([tif_chunk, 200, None], dst_port = xyz_c, verbose = verbose)
-        remove_glob(tif_chunk)
-
-        if vdatum is not None:
-            out, status = run_vdatum(xyz_chunk, vdc)
-            remove_glob(xyz_chunk)
-            xyz_chunk = os.path.join('result', os.path.basename(xyz_chunk)) 
-            os.rename(xyz_chunk, xyz_chunk_final)
-            vdatum_clean_result()
-
-            if verbose: echo_msg('transformed {} chunk to {}'.format(iv, ov))
-        else: os.rename(xyz_chunk, xyz_chunk_final)
-
-        if datalist is not None:
-            mb_inf(xyz_chunk_final)
-            datalist_append_entry([os.path.basename(xyz_chunk_final), 168, 1], datalist)
-            if verbose: echo_msg('appended xyz chunk {} to datalist {}'.format(xyz_chunk_final, datalist))
+    ## ==============================================
+    ## process the chunks in parallel, 4 chunks per task
+    ## to amortize the vdatum (java) startup cost.
+    ## datalist appends stay in the main process.
+    ## ==============================================
+    n_chunks = len(chunks)
+    chunk_batches = [chunks[x:x + 4] for x in range(0, n_chunks, 4)]
+    with concurrent.futures.ProcessPoolExecutor(max_workers = _waffles_workers(len(chunk_batches))) as ex:
+        futures = [ex.submit(_gdal2xyz_chunk_batch, cb, epsg, inc, vdc, verbose) for cb in chunk_batches]
+        i = 0
+        for future in concurrent.futures.as_completed(futures):
+            for xyz_chunk_final in future.result():
+                i += 1
+                echo_msg('* processed chunk {} [{}/{}]'.format(xyz_chunk_final, i, n_chunks))
+                if datalist is not None:
+                    mb_inf(xyz_chunk_final)
+                    datalist_append_entry([os.path.basename(xyz_chunk_final), 168, 1], datalist)
+                    if verbose: echo_msg('appended xyz chunk {} to datalist {}'.format(xyz_chunk_final, datalist))
+
+def _gdal2xyz_chunk(chunk, epsg = None, inc = None, vdc = None, verbose = False):
+    '''convert a single gdal `chunk` to xyz; optionally warp it to `epsg`/`inc`
+    and transform it with vdatum using the `vdc` vdatum config.
+
+    returns the final xyz chunk filename'''
+
+    xyz_chunk = '{}.xyz'.format(chunk.split('.')[0])
+    xyz_chunk_final = os.path.join('xyz', os.path.basename(xyz_chunk))
+
+    if epsg is not None or inc is not None:
+        tif_chunk = '{}_warp.tif'.format(chunk.split('.')[0])
+        gdw = 'gdalwarp {} -dstnodata -9999 -overwrite {}'.format(chunk, tif_chunk)
+        if epsg is not None: gdw += ' -t_srs EPSG:{}'.format(epsg)
+        if inc is not None: gdw += ' -tr {} {}'.format(inc, inc)
+        out, status = run_cmd(gdw, verbose = verbose)
+        remove_glob(chunk)
+    else: tif_chunk = chunk
+
+    with open(xyz_chunk, 'w') as xyz_c:
+        gdal_dump_entry([tif_chunk, 200, None], dst_port = xyz_c, verbose = verbose)
+    remove_glob(tif_chunk)
+
+    if vdc is not None:
+        ## each chunk gets its own vdatum result directory
+        vdc = dict(vdc)
+        vdc['result_dir'] = 'result_{}'.format(os.path.basename(xyz_chunk).split('.')[0])
+        out, status = run_vdatum(xyz_chunk, vdc)
+        remove_glob(xyz_chunk)
+        xyz_chunk = os.path.join(vdc['result_dir'], os.path.basename(xyz_chunk))
+        os.rename(xyz_chunk, xyz_chunk_final)
+        vdatum_clean_result(vdc['result_dir'])
+
+        if verbose: echo_msg('transformed {} chunk to {}'.format(vdc['ivert'], vdc['overt']))
+    else: os.rename(xyz_chunk, xyz_chunk_final)
+    return(xyz_chunk_final)
+
+def _gdal2xyz_chunk_batch(chunk_batch, epsg = None, inc = None, vdc = None, verbose = False):
+    '''run _gdal2xyz_chunk on each chunk in `chunk_batch`
+
+    returns a list of the final xyz chunk filenames'''
+
+    return([_gdal2xyz_chunk(chunk, epsg, inc, vdc, verbose) for chunk in chunk_batch])
     
 def gdal_inf(src_ds, warp = None):
     '''generate an info (.inf) file from a src_gdal file using gdal
@@ -2089,7 +2420,16 @@ def gdal_inf(src_ds, warp = None):
     returns the region [xmin, xmax, ymin, ymax] of src_ds'''
     
     minmax = gdal_region(src_ds, warp)
-    zr = src_ds.GetRasterBand(1).ComputeRasterMinMax()
+    band = src_ds.GetRasterBand(1)
+    ## ==============================================
+    ## use approximate (overview-based) min/max for
+    ## very large rasters; fall back to an exact scan
+    ## ==============================================
+    approx = (src_ds.RasterXSize * src_ds.RasterYSize) > 1e8
+    try:
+        zr = band.ComputeRasterMinMax(approx)
+    except: zr = band.ComputeRasterMinMax()
+    band = None
     minmax = minmax + list(zr)
     with open('{}.inf'.format(src_ds.GetDescription()), 'w') as inf:
         echo_msg('generating inf file for {}'.format(src_ds.GetDescription()))
@@ -2122,8 +2462,7 @@ def gdal_yield_entry(entry, region = None, verbose = False, epsg = None, z_regio
 def gdal_dump_entry(entry, dst_port = sys.stdout, region = None, verbose = False, epsg = None, z_region = None):
     '''dump the xyz data from the gdal entry to dst_port'''
     
-    for xyz in gdal_yield_entry(entry, region, verbose, epsg, z_region):
-        xyz_line(xyz, dst_port, True)
+    xyz_lines(gdal_yield_entry(entry, region, verbose, epsg, z_region), dst_port, True)
 
 ## ==============================================
 ## fetches processing (datalists fmt:400 - 499)
@@ -2146,8 +2485,7 @@ def fetch_yield_entry(entry = ['nos:datatype=xyz'], region = None, verbose = Fal
 def fetch_dump_entry(entry = ['nos:datatype=nos'], dst_port = sys.stdout, region = None, verbose = False):
     '''dump the xyz data from the fetch module datalist entry to dst_port'''
     
-    for xyz in fetch_yield_entry(entry, region, verbose):
-        xyz_line(xyz, dst_port, True)
+    xyz_lines(fetch_yield_entry(entry, region, verbose), dst_port, True)
         
 def fetch_module_yield_entry(entry, region = None, verbose = False, module = 'dc'):
     '''yield the xyz data from the fetch module datalist entry
@@ -2164,8 +2502,7 @@ def fetch_module_yield_entry(entry, region = None, verbose = False, module = 'dc
 def fetch_dc_dump_entry(entry, dst_port = sys.stdout, region = None, verbose = False, module = 'dc'):
     '''dump the xyz data from the fetch module datalist entry to dst_port'''
     
-    for xyz in fetch_module_yield_entry(entry, region, verbose, module):
-        xyz_line(xyz, dst_port, True)        
+    xyz_lines(fetch_module_yield_entry(entry, region, verbose, module), dst_port, True)
         
 ## ==============================================
 ## xyz processing (datalists fmt:168)
@@ -2181,22 +2518,23 @@ _xyz_config = {
     'lower_limit': None}
 
 _known_delims = [',', ' ', '\t', '/', ':']
+_known_delims_re = re.compile(r'([,\t /:])')
 
 def xyz_line_delim(xyz):
-    for delim in _known_delims:
-        this_xyz = xyz.split(delim)
-        if len(this_xyz) > 1: return(delim)
-    return(None)
+    '''find the delimiter used in the xyz line-string `xyz`
+    (whichever of `_known_delims` appears first in the line)
+
+    returns the delimiter or None'''
+    
+    m = _known_delims_re.search(xyz)
+    return(m.group(1) if m else None)
 
 def xyz_parse_line(xyz, xyz_c = _xyz_config):
     '''parse an xyz line-string, using _xyz_config
 
     returns [x, y, z]'''
     
-    this_line = xyz.strip()
-    if xyz_c['delim'] is None:
-        xyz_c['delim'] = xyz_line_delim(this_line)
-    this_xyz = this_line.split(xyz_c['delim'])
+    this_xyz = xyz.strip().split(xyz_c['delim'])
     try:
         o_xyz = [float(this_xyz[xyz_c['xpos']]), float(this_xyz[xyz_c['ypos']]), float(this_xyz[xyz_c['zpos']])]
     except IndexError as e:
@@ -2215,26 +2553,34 @@ def xyz_parse(src_xyz, xyz_c = _xyz_config, region = None, verbose = False):
     
     ln = 0
     skip = int(xyz_c['skip'])
-    xpos = xyz_c['xpos']
-    ypos = xyz_c['ypos']
-    zpos = xyz_c['zpos']
     pass_d = True
     #if verbose: echo_msg('parsing xyz data from {}...'.format(xyz_c['name']))
+    src_xyz = iter(src_xyz)
+    for xyz in itertools.islice(src_xyz, skip): pass
+
+    ## ==============================================
+    ## find the delimiter once, from the first data
+    ## line, before entering the parse loop.
+    ## ==============================================
+    if xyz_c['delim'] is None:
+        first_xyz = next(src_xyz, None)
+        if first_xyz is not None:
+            xyz_c['delim'] = xyz_line_delim(first_xyz.strip())
+            src_xyz = itertools.chain([first_xyz], src_xyz)
+        
     for xyz in src_xyz:
         pass_d = True
-        if ln >= skip:
-            this_xyz = xyz_parse_line(xyz, xyz_c)
-            if this_xyz is not None:
-                if region is not None:
-                    if not xyz_in_region_p(this_xyz, region): pass_d = False
-                if xyz_c['upper_limit'] is not None or xyz_c['lower_limit'] is not None:
-                    if not z_pass(this_xyz[2], upper_limit = xyz_c['upper_limit'], lower_limit = xyz_c['lower_limit']): pass_d = False
-            else: pass_d = False
+        this_xyz = xyz_parse_line(xyz, xyz_c)
+        if this_xyz is not None:
+            if region is not None:
+                if not xyz_in_region_p(this_xyz, region): pass_d = False
+            if xyz_c['upper_limit'] is not None or xyz_c['lower_limit'] is not None:
+                if not z_pass(this_xyz[2], upper_limit = xyz_c['upper_limit'], lower_limit = xyz_c['lower_limit']): pass_d = False
+        else: pass_d = False
             
-            if pass_d:
-                ln += 1
-                yield(this_xyz)
-        else: skip -= 1
+        if pass_d:
+            ln += 1
+            yield(this_xyz)
     if verbose: echo_msg('parsed {} data records from {}'.format(ln, xyz_c['name']))
 
 def xyz2py(src_xyz):
@@ -2266,11 +2612,10 @@ def xyz_block(src_xyz, region, inc, dst_xyz = sys.stdout, weights = False, verbo
         if x > region[0] and x < region[1]:
             if y > region[2] and y < region[3]:
                 xpos, ypos = _geo2pixel(x, y, dst_gt)
-                try:
+                if 0 <= ypos < ycount and 0 <= xpos < xcount:
                     sumArray[ypos, xpos] += z
                     ptArray[ypos, xpos] += 1
                     if weights: wtArray[ypos, xpos] += w
-                except: pass
     ptArray[ptArray == 0] = np.nan
     if weights:
         wtArray[wtArray == 0] = 1
@@ -2282,19 +2627,54 @@ def xyz_block(src_xyz, region, inc, dst_xyz = sys.stdout, weights = False, verbo
 
     outarray[np.isnan(outarray)] = -9999
     
-    for y in range(0, ycount):
-        for x in range(0, xcount):
-            geo_x, geo_y = _pixel2geo(x, y, dst_gt)
-            z = outarray[y,x]
-            if z != -9999:
-                yield([geo_x, geo_y, z])
+    ys, xs = np.nonzero(outarray != -9999)
+    geo_xs, geo_ys = _affine_apply(dst_gt, xs, ys)
+    for geo_x, geo_y, z in zip(geo_xs.tolist(), geo_ys.tolist(), outarray[ys, xs]):
+        yield([geo_x, geo_y, z])
+    
+@functools.lru_cache(maxsize = 16)
+def _xyz_line_fmt(n, delim):
+    '''return the bound str.format of an `n` column "xyz" line;
+    the values should be passed as str (see xyz_line).'''
     
+    return('{}\n'.format(delim.join(['{}'] * n)).format)
+
 def xyz_line(line, dst_port = sys.stdout, encode = False):
     '''write "xyz" `line` to `dst_port`
-    `line` should be a list of xyz values [x, y, z, ...].'''
-    delim = _xyz_config['delim'] if _xyz_config['delim'] is not None else ' '
+    `line` should be a list of xyz values [x, y, z, ...].
+    the values are written as str(x) (e.g. 1.1 for np.float32(1.1)).'''
     
-    l = '{}\n'.format(delim.join([str(x) for x in line]))
+    l = _xyz_line_fmt(len(line), _xyz_config['delim'] if _xyz_config['delim'] is not None else ' ')(*map(str, line))
+    if encode: l = l.encode('utf-8')
+    dst_port.write(l)
+
+def xyz_lines(src_xyz, dst_port = sys.stdout, encode = False, batch = 16384):
+    '''write the "xyz" lines from `src_xyz` to `dst_port`, `batch` lines at a time.
+    each batch of equal-width lines is formatted with a single string
+    operation and written with a single call; the values are written
+    as str(x), so the output is the same as calling xyz_line on each line.'''
+
+    delim = _xyz_config['delim'] if _xyz_config['delim'] is not None else ' '
+    src_xyz = iter(src_xyz)
+    while True:
+        xyzs = list(itertools.islice(src_xyz, batch))
+        if len(xyzs) == 0: break
+        n = len(xyzs[0])
+        if all(len(xyz) == n for xyz in xyzs):
+            l = ('{}\n'.format(delim.join(['{}'] * n)) * len(xyzs)).format(*map(str, itertools.chain.from_iterable(xyzs)))
+        else: l = ''.join([_xyz_line_fmt(len(xyz), delim)(*map(str, xyz)) for xyz in xyzs])
+        if encode: l = l.encode('utf-8')
+        dst_port.write(l)
+
+def xyz_np_lines(xyz_arr, dst_port = sys.stdout, encode = False):
+    '''write the rows of numpy array `xyz_arr` to `dst_port` as "xyz" lines
+    the whole array is formatted with a single string operation and
+    written with a single call.'''
+    
+    if len(xyz_arr) == 0: return
+    delim = _xyz_config['delim'] if _xyz_config['delim'] is not None else ' '
+    l_fmt = '{}\n'.format(delim.join(['%.7f'] * xyz_arr.shape[1]))
+    l = (l_fmt * xyz_arr.shape[0]) % tuple(xyz_arr.ravel().tolist())
     if encode: l = l.encode('utf-8')
     dst_port.write(l)
 
@@ -2380,8 +2760,7 @@ def gmt_yield_entry(entry, region = None, verbose = False, z_region = None):
 def xyz_dump_entry(entry, dst_port = sys.stdout, region = None, verbose = False, z_region = None):
     '''dump the xyz data from the xyz datalist entry to dst_port'''
     
-    for xyz in xyz_yield_entry(entry, region, verbose, z_region):
-        xyz_line(xyz, dst_port, True, None)
+    xyz_lines(xyz_yield_entry(entry, region, verbose, z_region), dst_port, True)
 
 ## ==============================================
 ## datalists and entries - datalists.py
@@ -2391,6 +2770,7 @@ def xyz_dump_entry(entry, dst_port = sys.stdout, region = None, verbose = False,
 ## ==============================================
 _known_dl_delims = [' ']
 _known_datalist_fmts = {-1: ['datalist', 'mb-1'], 168: ['xyz', 'csv', 'dat', 'ascii'], 200: ['tif', 'img', 'grd', 'nc', 'vrt', 'bag'], 400: ['nos', 'dc', 'gmrt', 'srtm', 'charts', 'mb']}
+_known_datalist_exts = {ext: key for key in reversed(list(_known_datalist_fmts.keys())) for ext in _known_datalist_fmts[key]}
 _known_datalist_fmts_short_desc = lambda: '\n  '.join(['{}\t{}'.format(key, _known_datalist_fmts[key]) for key in _known_datalist_fmts])
 _dl_inf_h = {
     -1: lambda e: datalist_inf_entry(e),
@@ -2399,35 +2779,62 @@ _dl_inf_h = {
 }
 _dl_pass_h = lambda e: path_exists_or_url(e[0])
 
-def datalist_inf(dl, inf_file = True, overwrite = False):
+def datalist_inf(dl, inf_file = True, overwrite = False, dl_infs = None):
     '''return the region of the datalist and generate
-    an associated `.inf` file if `inf_file` is True.'''
-    
+    an associated `.inf` file if `inf_file` is True.
+    the regions of the sub-datalists are gathered in `dl_infs`
+    {path: region} as the tree is walked, so each sub-datalist is
+    only scanned once; their `.inf` files are written together
+    once the top datalist is done.'''
+
+    top = dl_infs is None
+    if top: dl_infs = {}
     out_regions = []
     minmax = None
-    dh_p = lambda e: region_valid_p(inf_entry(e, True)) if e[1] == -1 else region_valid_p(inf_entry(e))
+
+    def dl_region(e):
+        if e[0] not in dl_infs.keys():
+            dl_infs[e[0]] = datalist_inf(e[0], inf_file = False, dl_infs = dl_infs)
+        return(dl_infs[e[0]])
+    
+    ## ==============================================
+    ## the inf of a datalist, and of a gdal entry (fmt 200),
+    ## is always regenerated
+    ## ==============================================
+    dh_p = lambda e: region_valid_p(dl_region(e)) if e[1] == -1 else region_valid_p(inf_entry_cached(e, e[1] == 200))
     for entry in datalist(dl, pass_h = dh_p):
-        #entry_inf = inf_entry(entry, True) if entry[1] == -1 else inf_entry(entry)
-        if entry[1] == 200:
-            entry_inf = inf_entry(entry, True)
-        else: entry_inf = inf_entry(entry)
+        entry_inf = inf_entry_cached(entry)
         if entry_inf is not None:
-            out_regions.append(inf_entry(entry)[:6])
+            out_regions.append(entry_inf[:6])
     
-    out_regions = [x for x in out_regions if x is not None]
     if len(out_regions) == 0:
         minmax = None
     elif len(out_regions) == 1:
         minmax = out_regions[0]
     else:
-        out_region = out_regions[0]
-        for x in out_regions[1:]:
-            out_region = regions_merge(out_region, x)
-        minmax = out_region
-    if minmax is not None and inf_file:
-        echo_msg('generating inf for datalist {}'.format(dl))
-        with open('{}.inf'.format(dl), 'w') as inf:
-            inf.write('{}\n'.format(region_format(minmax, 'inf')))
+        ## ==============================================
+        ## merge all the regions at once; the z range is
+        ## only kept if every region has one (as in
+        ## regions_merge)
+        ## ==============================================
+        n = 6 if min([len(x) for x in out_regions]) > 4 else 4
+        r_arr = np.array([x[:n] for x in out_regions], dtype = np.float64)
+        r_mins = r_arr.min(axis = 0).tolist()
+        r_maxs = r_arr.max(axis = 0).tolist()
+        minmax = [r_mins[0], r_maxs[1], r_mins[2], r_maxs[3]]
+        if n == 6: minmax += [r_mins[4], r_maxs[5]]
+        r_arr = None
+    if not top: return(minmax)
+
+    ## ==============================================
+    ## write the sub-datalist infs and the datalist inf
+    ## ==============================================
+    inf_out = [[this_dl, this_inf] for this_dl, this_inf in dl_infs.items() if this_inf is not None]
+    if minmax is not None and inf_file: inf_out.append([dl, minmax])
+    for this_dl, this_inf in inf_out:
+        echo_msg('generating inf for datalist {}'.format(this_dl))
+        with open('{}.inf'.format(this_dl), 'w') as inf:
+            inf.write('{}\n'.format(region_format(this_inf, 'inf')))
     return(minmax)
 
 def datalist_inf_entry(e):
@@ -2438,16 +2845,58 @@ def datalist_inf_entry(e):
     return(datalist_inf(e[0]))
 
 def datalist_append_entry(entry, datalist):
-    '''append entry to datalist file `datalist`'''
+    '''append entry to datalist file `datalist`
+    `datalist` may also be an open file object, for use in loops.'''
     
-    with open(datalist, 'a') as outfile:
-        outfile.write('{}\n'.format(' '.join([str(x) for x in entry])))
+    if hasattr(datalist, 'write'):
+        datalist.write('{}\n'.format(' '.join([str(x) for x in entry])))
+    else:
+        with open(datalist, 'a') as outfile:
+            outfile.write('{}\n'.format(' '.join([str(x) for x in entry])))
+
+def _scandir_datalists(src_dir, rel_dir = ''):
+    '''recursively scan `src_dir` for datalist files
+
+    yields the datalist paths relative to the top `src_dir`'''
+    
+    with os.scandir(src_dir) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks = False):
+                for dl in _scandir_datalists(entry.path, os.path.join(rel_dir, entry.name)):
+                    yield(dl)
+            elif entry.name.endswith('.datalist'):
+                yield(os.path.join(rel_dir, entry.name))
+
+def datalist_archive_datalist(arch_dir, a_dl):
+    '''append all the datalists found in `arch_dir` to the archive datalist `a_dl`'''
+    
+    rel_files = list(_scandir_datalists(arch_dir))
+    with open(a_dl, 'a', buffering = 1048576) as a_fob:
+        a_fob.writelines(['{} -1 1\n'.format(rel_file) for rel_file in rel_files])
 
 #def datalist_polygonize_datalist(dl, layer = None):
     
-def datalist_archive_yield_entry(entry, dirname = 'archive', region = None, inc = 1, weight = None, verbose = None, z_region = None):
+def _xyz_copy_p(src_xyz):
+    '''check if the xyz file `src_xyz` can be archived as-is:
+    space delimited with at least x, y and z on the first line.
+
+    returns True or False'''
+    
+    with open(src_xyz, 'r') as src:
+        this_line = src.readline()
+    if xyz_line_delim(this_line) != ' ': return(False)
+    try:
+        [float(x) for x in this_line.split()[:3]]
+    except: return(False)
+    return(len(this_line.split()) >= 3)
+
+def datalist_archive_yield_entry(entry, dirname = 'archive', region = None, inc = 1, weight = None, verbose = None, z_region = None, yield_xyz = True):
     '''archive a datalist entry.
-    a datalist entry is [path, format, weight, ...]'''
+    a datalist entry is [path, format, weight, ...]
+
+    un-weighted space-delimited xyz entries with no region/z-region
+    filter are copied as-is rather than parsed and re-written;
+    set `yield_xyz` to False if the data is not needed.'''
     
     if region is None:
         a_name = entry[-1]
@@ -2463,10 +2912,17 @@ def datalist_archive_yield_entry(entry, dirname = 'archive', region = None, inc
     if not os.path.exists(a_dir): os.makedirs(a_dir)
     if not os.path.exists(a_xyz_dir): os.makedirs(a_xyz_dir)
 
-    with open(a_xyz, 'w') as fob:
-        for xyz in datalist_yield_entry(entry, region = region, verbose = verbose, z_region = z_region):
-            xyz_line(xyz, fob)
-            yield(xyz)
+    if entry[1] == 168 and region is None and z_region is None and entry[2] is None and _xyz_copy_p(entry[0]):
+        with open(entry[0], 'rb') as src, open(a_xyz, 'wb') as fob:
+            shutil.copyfileobj(src, fob, 1048576)
+        if yield_xyz:
+            for xyz in datalist_yield_entry(entry, region = region, verbose = verbose, z_region = z_region):
+                yield(xyz)
+    else:
+        with open(a_xyz, 'w', buffering = 1048576) as fob:
+            for xyz in datalist_yield_entry(entry, region = region, verbose = verbose, z_region = z_region):
+                xyz_line(xyz, fob)
+                if yield_xyz: yield(xyz)
             
     mb_inf(a_xyz)
     datalist_append_entry([i_xyz + '.xyz', 168, entry[2] if entry[2] is not None else 1], a_dl)
@@ -2477,28 +2933,22 @@ def datalist_archive(wg, arch_dir = 'archive', region = None, verbose = False, z
     returns the datalist of the archive'''
     
     if region is not None:
-        dl_p = lambda e: regions_intersect_ogr_p(region, inf_entry(e))
+        dl_p = lambda e: regions_intersect_ogr_p(region, inf_entry_cached(e))
     else: dl_p = _dl_pass_h
 
-    for this_entry in datalist(wg['datalist'], wt = 1 if wg['weights'] else None, pass_h = dl_p, verbose = verbose):
-        for xyz in datalist_archive_yield_entry(this_entry, dirname = arch_dir, region = region, verbose = verbose, z_region = z_region):
+    for this_entry in datalist(wg['datalist'], wt = 1 if wg['weights'] else None, pass_h = dl_p, verbose = verbose, region = region, index = wg['index']):
+        for xyz in datalist_archive_yield_entry(this_entry, dirname = arch_dir, region = region, verbose = verbose, z_region = z_region, yield_xyz = False):
             pass
     a_dl = os.path.join(arch_dir, '{}.datalist'.format(wg['name']))
-            
-    for dir_, _, files in os.walk(arch_dir):
-        for f in files:
-            if '.datalist' in f:
-                rel_dir = os.path.relpath(dir_, arch_dir)
-                rel_file = os.path.join(rel_dir, f)
-                datalist_append_entry([rel_file, -1, 1], a_dl)
+    datalist_archive_datalist(arch_dir, a_dl)
     return(a_dl, 0)
 
 def datalist_list(wg):
     '''list the datalist entries in the given region'''
     if wg['region'] is not None:
-        dl_p = lambda e: regions_intersect_ogr_p(wg['region'], inf_entry(e))
+        dl_p = lambda e: regions_intersect_ogr_p(wg['region'], inf_entry_cached(e))
     else: dl_p = _dl_pass_h
-    for this_entry in datalist(wg['datalist'], wt = 1, pass_h = dl_p):
+    for this_entry in datalist(wg['datalist'], wt = 1, pass_h = dl_p, region = wg['region'], index = wg['index']):
         print(' '.join([','.join(x) if i == 3 else str(x) for i,x in enumerate(this_entry[:-1])]))
     
 def datalist_echo(entry):
@@ -2533,20 +2983,21 @@ def entry2py(dle):
     '''convert a datalist entry to python
 
     return the entry as a list [fn, fmt, wt, ...]'''
-    this_entry = dle.rstrip().split()
+    
+    this_entry = dle.split()
     try:
-        entry = [x if n == 0 else int(x) if n < 2 else float(x) if n < 3 else x for n, x in enumerate(this_entry)]
+        entry = [this_entry[0]]
+        if len(this_entry) > 1: entry.append(int(this_entry[1]))
+        if len(this_entry) > 2: entry.append(float(this_entry[2]))
     except Exception as e:
         echo_error_msg('could not parse entry {}'.format(dle))
         return(None)
+    entry.extend(this_entry[3:])
     if len(entry) < 2:
-        for key in _known_datalist_fmts.keys():
-            se = entry[0].split('.')
-            if len(se) == 1:
-                see = entry[0].split(':')[0]
-            else: see = se[-1]
-            if see in _known_datalist_fmts[key]:
-                entry.append(int(key))
+        se = entry[0].split('.')
+        see = entry[0].split(':')[0] if len(se) == 1 else se[-1]
+        if see in _known_datalist_exts.keys():
+            entry.append(_known_datalist_exts[see])
     if len(entry) < 3: entry.append(1)
     return(entry)
 
@@ -2558,11 +3009,11 @@ def datalist2py(dl, region = None):
     this_dir = os.path.dirname(dl)
     this_entry = entry2py(dl)
     if this_entry[1] == -1:
-        with open(this_entry[0], 'r') as op:
-            for this_line in op:
-                if this_line[0] != '#' and this_line[0] != '\n' and this_line[0].rstrip() != '':
-                    #these_entries.append([os.path.join(this_dir, x) if n == 0 else x for n,x in enumerate(entry2py(this_line.rstrip()))])
-                    these_entries.append(entry2py(this_line.rstrip()))
+        with open(this_entry[0], 'rb') as op:
+            if os.fstat(op.fileno()).st_size > 0:
+                mm = mmap.mmap(op.fileno(), 0, access = mmap.ACCESS_READ)
+                these_entries = [entry2py(this_line.decode('utf-8')) for this_line in iter(mm.readline, b'') if this_line[:1] != b'#' and not this_line[:1].isspace()]
+                mm.close()
     elif this_entry[1] == 400:
         fetch_mod = this_entry[0].split(':')[0]
         fetch_args = this_entry[0].split(':')[1:]
@@ -2582,89 +3033,261 @@ def datalist2py(dl, region = None):
     else: these_entries.append(this_entry)
     return(these_entries)
 
+## ==============================================
+## datalist entry yield functions, keyed by format
+## ==============================================
+_dl_yield_h = {
+    168: lambda e, r, v, z: xyz_yield_entry(e, region = r, verbose = v, z_region = z),
+    200: lambda e, r, v, z: gdal_yield_entry(e, region = r, verbose = v, z_region = z),
+    400: lambda e, r, v, z: fetch_yield_entry(e, region = r, verbose = v),
+    401: lambda e, r, v, z: fetch_module_yield_entry(e, r, v, 'nos'),
+    402: lambda e, r, v, z: fetch_module_yield_entry(e, r, v, 'dc'),
+    403: lambda e, r, v, z: fetch_module_yield_entry(e, r, v, 'charts'),
+    404: lambda e, r, v, z: fetch_module_yield_entry(e, r, v, 'srtm'),
+    406: lambda e, r, v, z: fetch_module_yield_entry(e, r, v, 'mb'),
+    408: lambda e, r, v, z: fetch_module_yield_entry(e, r, v, 'gmrt'),
+}
+
 def datalist_yield_entry(this_entry, region, verbose = False, z_region = None):
-    if this_entry[1] == 168:
-        for xyz in xyz_yield_entry(this_entry, region = region, verbose = verbose, z_region = z_region):
-            yield(xyz)
-    elif this_entry[1] == 200:
-        for xyz in gdal_yield_entry(this_entry, region = region, verbose = verbose, z_region = z_region):
-            yield(xyz)
-    elif this_entry[1] == 400:
-        for xyz in fetch_yield_entry(this_entry, region = region, verbose = verbose):
-            yield(xyz)
-    elif this_entry[1] == 401:
-        for xyz in fetch_module_yield_entry(this_entry, region, verbose, 'nos'):
-            yield(xyz)
-    elif this_entry[1] == 402:
-        for xyz in fetch_module_yield_entry(this_entry, region, verbose, 'dc'):
-            yield(xyz)
-    elif this_entry[1] == 403:
-        for xyz in fetch_module_yield_entry(this_entry, region, verbose, 'charts'):
-            yield(xyz)
-    elif this_entry[1] == 404:
-        for xyz in fetch_module_yield_entry(this_entry, region, verbose, 'srtm'):
-            yield(xyz)
-    elif this_entry[1] == 406:
-        for xyz in fetch_module_yield_entry(this_entry, region, verbose, 'mb'):
-            yield(xyz)
-    elif this_entry[1] == 408:
-        for xyz in fetch_module_yield_entry(this_entry, region, verbose, 'gmrt'):
+    '''yield the xyz data from the datalist entry using the
+    yield function for the entry's format in `_dl_yield_h`
+
+    yields [x, y, z, <w, ...>]'''
+    
+    this_h = _dl_yield_h.get(this_entry[1])
+    if this_h is not None:
+        for xyz in this_h(this_entry, region, verbose, z_region):
             yield(xyz)
-            
+
+def _datalist_entry_xyz(args):
+    '''gather the xyz data from a datalist entry into a list;
+    top-level so it can be sent to a worker pool.
+    `args` is [entry, region, verbose, z_region]
+
+    returns a list of xyz line data [[x, y, z, ...], ...]'''
+
+    this_entry, region, verbose, z_region = args
+    return([xyz for xyz in datalist_yield_entry(this_entry, region, verbose = verbose, z_region = z_region)])
 
 def datalist_yield_xyz(dl, fmt = -1, wt = None,
                        pass_h = lambda e: True,
                        dl_proc_h = False, region = None, archive = False,
-                       mask = False, verbose = False, z_region = None):
+                       mask = False, verbose = False, z_region = None, index = False, parallel = False):
     '''parse out the xyz data from the datalist
     for xyz in datalist_yield_xyz(dl): xyz_line(xyz)
 
+    if `parallel` is True, the entries are parsed in a process pool;
+    they are still yielded in datalist order. archiving is always
+    done in this process.
+
     yields xyz line data [x, y, z, ...]'''
 
-    for this_entry in datalist(dl, fmt = fmt, wt = wt, pass_h = pass_h, dl_proc_h = dl_proc_h, verbose = verbose):
+    if parallel and not archive and _waffles_workers() > 1:
+        ## ==============================================
+        ## keep two entries per worker in the pool and yield
+        ## the data of the oldest one as soon as it's parsed
+        ## ==============================================
+        n_workers = _waffles_workers()
+        with concurrent.futures.ProcessPoolExecutor(max_workers = n_workers, initializer = _waffles_worker_init) as executor:
+            pending = []
+            for this_entry in datalist(dl, fmt = fmt, wt = wt, pass_h = pass_h, dl_proc_h = dl_proc_h, verbose = verbose, region = region, z_region = z_region, index = index):
+                pending.append(executor.submit(_datalist_entry_xyz, [this_entry, region, verbose, z_region]))
+                if len(pending) >= n_workers * 2:
+                    for xyz in pending.pop(0).result():
+                        yield(xyz)
+            for this_future in pending:
+                for xyz in this_future.result():
+                    yield(xyz)
+        return
+
+    ## ==============================================
+    ## look one entry ahead and have the kernel start
+    ## reading it while the current entry is processed
+    ## ==============================================
+    dl_entries = datalist(dl, fmt = fmt, wt = wt, pass_h = pass_h, dl_proc_h = dl_proc_h, verbose = verbose, region = region, z_region = z_region, index = index)
+    this_entry = next(dl_entries, None)
+    while this_entry is not None:
+        next_entry = next(dl_entries, None)
+        if next_entry is not None and next_entry[1] in _dl_inf_h.keys() and next_entry[1] != -1:
+            file_readahead(next_entry[0])
         dly = datalist_yield_entry(this_entry, region, verbose = verbose, z_region = z_region)
         if archive: dly = datalist_archive_yield_entry(this_entry, dirname = 'archive', region = region, weight = wt, verbose = verbose, z_region = z_region)
         for xyz in dly:
             yield(xyz)
+        this_entry = next_entry
 
 def datalist_dump_xyz(dl, fmt = -1, wt = None,
                       pass_h = lambda e: True,
                       dl_proc_h = False,
                       region = None, archive = False, mask = False,
-                      verbose = False, dst_port = sys.stdout, z_region = None):
+                      verbose = False, dst_port = sys.stdout, z_region = None, index = False):
     '''parse out the xyz data from the datalist
     for xyz in datalist_yield_xyz(dl): xyz_line(xyz)
 
     yields xyz line data [x, y, z, ...]'''
 
-    for xyz in datalist_yield_xyz(dl, fmt, wt, pass_h, dl_proc_h, region, archive, mask, verbose, z_region):
-        xyz_line(xyz, dst_port, verbose)
+    xyz_lines(datalist_yield_xyz(dl, fmt, wt, pass_h, dl_proc_h, region, archive, mask, verbose, z_region, index = index), dst_port, verbose)
             
+## ==============================================
+## datalist spatial index
+##
+## the leaf entries of a datalist (and all its
+## sub-datalists) are stored in an sqlite r-tree
+## `<datalist>.idx.sqlite` so a region query can
+## skip the entries which don't intersect without
+## recursing the datalists or reading `.inf` files.
+## the z-range of each entry is stored as well to
+## skip entries outside of a z-region.
+## the index is rebuilt when the contents of any of
+## the datalists in the tree change (or the index
+## layout does). generated major datalists (.mjr.datalist)
+## are not indexed, their sub-datalists are.
+## indexing is opt-in, see `index` in datalist().
+## ==============================================
+_datalist_index_version = 3
+
+def _datalist_digest(dl_fn):
+    '''returns the blake2b hex digest of the contents of datalist `dl_fn`'''
+
+    import hashlib
+    with open(dl_fn, 'rb') as dl_f:
+        return(hashlib.blake2b(dl_f.read()).hexdigest())
+
+def datalist_index(dl, verbose = False):
+    '''build (or refresh) the sqlite spatial index of datalist `dl`
+
+    returns the index filename or None if the index could not be built'''
+
+    dl_path = entry2py(dl)[0]
+    if not os.path.exists(dl_path): return(None)
+    dl_dir = os.path.dirname(dl_path)
+    idx_fn = '{}.idx.sqlite'.format(dl_path)
+    if os.path.exists(idx_fn):
+        stale = True
+        con = None
+        try:
+            con = sqlite3.connect(idx_fn)
+            if con.execute('PRAGMA user_version').fetchone()[0] != _datalist_index_version:
+                raise ValueError('index version')
+            stale = False
+            for this_dl, this_digest in con.execute('SELECT path, digest FROM dls'):
+                this_dl = os.path.join(dl_dir, this_dl)
+                if not os.path.exists(this_dl) or _datalist_digest(this_dl) != this_digest:
+                    stale = True
+                    break
+        except: stale = True
+        if con is not None: con.close()
+        if not stale: return(idx_fn)
+
+    ## ==============================================
+    ## build the index into a temporary file next to it
+    ## and move it into place when done, so a concurrent
+    ## reader sees either the old or the new index.
+    ## ==============================================
+    import tempfile
+    if verbose: echo_msg('indexing datalist {}'.format(dl_path))
+    con = None
+    tmp_fd, tmp_fn = tempfile.mkstemp(prefix = '.{}.'.format(os.path.basename(dl_path)), suffix = '.idx.sqlite', dir = dl_dir if dl_dir != '' else '.')
+    os.close(tmp_fd)
+    try:
+        con = sqlite3.connect(tmp_fn)
+        con.execute('CREATE VIRTUAL TABLE idx USING rtree(id, minx, maxx, miny, maxy)')
+        con.execute('PRAGMA user_version = {}'.format(_datalist_index_version))
+        con.execute('CREATE TABLE entries (id INTEGER PRIMARY KEY, path TEXT, fmt INTEGER, wt REAL, md TEXT, dl TEXT, zmin REAL, zmax REAL)')
+        con.execute('CREATE TABLE dls (path TEXT, digest TEXT)')
+        con.execute('INSERT INTO dls VALUES (?, ?)', (os.path.basename(dl_path), _datalist_digest(dl_path)))
+        for n, this_entry in enumerate(datalist(dl_path, wt = 1, dl_proc_h = True)):
+            rel_path = os.path.relpath(this_entry[0], dl_dir) if dl_dir != '' else this_entry[0]
+            if this_entry[1] == -1:
+                con.execute('INSERT INTO dls VALUES (?, ?)', (rel_path, _datalist_digest(this_entry[0])))
+                continue
+            this_inf = inf_entry_cached(this_entry) if this_entry[1] in _dl_inf_h.keys() else None
+            z_range = this_inf[4:6] if this_inf is not None and len(this_inf) >= 6 else [None, None]
+            con.execute('INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)', (n, rel_path, this_entry[1], this_entry[2], ','.join(this_entry[3]), this_entry[4], z_range[0], z_range[1]))
+            if this_inf is not None:
+                con.execute('INSERT INTO idx VALUES (?, ?, ?, ?, ?)', (n, this_inf[0], this_inf[1], this_inf[2], this_inf[3]))
+        con.commit()
+        con.close()
+        os.replace(tmp_fn, idx_fn)
+    except Exception as e:
+        echo_error_msg('could not index datalist {}, {}'.format(dl_path, e))
+        if con is not None: con.close()
+        try:
+            os.remove(tmp_fn)
+        except: pass
+        return(None)
+    return(idx_fn)
+
+def datalist_region_entries(dl, region, wt = None, verbose = False, z_region = None):
+    '''query the spatial index of datalist `dl` for the entries which
+    intersect `region` and, optionally, z-region [lower, upper].
+    entries without a known region/z-range (e.g. fetches modules) are
+    always returned.
+
+    returns a list of entries [path, fmt, wt, [md], dl-name] or None if
+    `dl` is not an indexable datalist or the index could not be read'''
+    
+    this_entry = entry2py(dl)
+    if this_entry is None or this_entry[1] != -1: return(None)
+    if this_entry[0].endswith('.mjr.datalist'): return(None)
+    idx_fn = datalist_index(this_entry[0], verbose = verbose)
+    if idx_fn is None: return(None)
+    dl_dir = os.path.dirname(this_entry[0])
+    z_lower, z_upper = z_region if z_region is not None else [None, None]
+    con = None
+    try:
+        con = sqlite3.connect(idx_fn)
+        rows = con.execute('''SELECT path, fmt, wt, md, dl FROM entries
+        WHERE (id IN (SELECT id FROM idx WHERE minx <= ? AND maxx >= ? AND miny <= ? AND maxy >= ?)
+        OR id NOT IN (SELECT id FROM idx))
+        AND (? IS NULL OR zmax IS NULL OR zmax >= ?) AND (? IS NULL OR zmin IS NULL OR zmin <= ?)
+        ORDER BY id''', (region[1], region[0], region[3], region[2], z_lower, z_lower, z_upper, z_upper)).fetchall()
+    except Exception as e:
+        if verbose: echo_error_msg('could not read datalist index {}, {}'.format(idx_fn, e))
+        rows = None
+    if con is not None: con.close()
+    if rows is None: return(None)
+    return([[os.path.join(dl_dir, r[0]), r[1], None if wt is None else wt * r[2], r[3].split(','), r[4]] for r in rows])
+    
 def datalist(dl, fmt = -1, wt = None,
              pass_h = lambda e: True,
-             dl_proc_h = False, verbose = False):
+             dl_proc_h = False, verbose = False, region = None, z_region = None, index = False):
     '''recurse a datalist/entry
     for entry in datalist(dl): do_something_with entry
 
+    if `index` is True and `region` is given, the datalist spatial
+    index is used to skip the entries which don't intersect it (or
+    the z-region [lower, upper] `z_region`).
+
     yields entry [path, fmt, wt, ...]'''
 
+    if index and region is not None and not dl_proc_h:
+        these_entries = datalist_region_entries(dl, region, wt, verbose = verbose, z_region = z_region)
+        if these_entries is not None:
+            if verbose: echo_msg('parsing datalist index ({}) {}'.format(wt, dl))
+            for this_entry in these_entries:
+                if path_exists_or_url(this_entry[0]) and pass_h(this_entry):
+                    yield(this_entry)
+            return
+    
     this_dir = os.path.dirname(dl)
+    dl_name = os.path.basename(dl).split('.')[0]
     these_entries = datalist2py(dl)
     if len(these_entries) == 0: these_entries = [entry2py(dl)]
     for this_entry in these_entries:
         if this_entry is not None:
-            this_entry[0] = os.path.join(this_dir, this_entry[0])
-            if wt is not None:
-                this_entry[2] = wt * this_entry[2]
-            else: this_entry[2] = wt
-            this_entry_md = ' '.join(this_entry[3:]).split(',')
-            this_entry = this_entry[:3] + [this_entry_md] + [os.path.basename(dl).split('.')[0]]
+            if this_dir != '': this_entry[0] = os.path.join(this_dir, this_entry[0])
+            this_entry[2] = wt * this_entry[2] if wt is not None else None
+            if len(this_entry) == 4:
+                this_entry[3] = this_entry[3].split(',')
+            else: this_entry[3:] = [' '.join(this_entry[3:]).split(',')]
+            this_entry.append(dl_name)
             if path_exists_or_url(this_entry[0]) and pass_h(this_entry):
                 if verbose and this_entry[1] == -1: echo_msg('parsing datalist ({}) {}'.format(this_entry[2], this_entry[0]))
                 if this_entry[1] == -1:
                     if dl_proc_h: yield(this_entry)
                     #dl_proc_h(this_entry)
-                    for entry in datalist(this_entry[0], fmt, this_entry[2], pass_h, dl_proc_h, verbose):
+                    for entry in datalist(this_entry[0], fmt, this_entry[2], pass_h, dl_proc_h, verbose, region, z_region, index):
                         yield(entry)
                 else: yield(this_entry)
             
@@ -2674,6 +3297,28 @@ def datalist(dl, fmt = -1, wt = None,
 ##
 ## Requires MBSystem, GMT, GDAL and VDatum for full functionality
 ## ==============================================
+
+## ==============================================
+## the number of worker processes waffles may use.
+## the workers of the cli region and dem chunk pools
+## set this to 1 (_waffles_worker_init), so the chunk,
+## datalist, spatial-metadata and split-sample pools
+## inside them don't multiply the workers.
+## ==============================================
+_waffles_max_workers = None
+
+def _waffles_workers(n = None):
+    '''returns the number of worker processes to use for `n` tasks'''
+
+    max_w = os.cpu_count() if _waffles_max_workers is None else _waffles_max_workers
+    return(max_w if n is None else max(1, min(n, max_w)))
+
+def _waffles_worker_init():
+    '''initialize a cli region or dem chunk worker process, see _waffles_max_workers'''
+
+    global _waffles_max_workers
+    _waffles_max_workers = 1
+
 _waffles_grid_info = {
     'datalist': None,
     'datalists': [],
@@ -2698,68 +3343,85 @@ _waffles_grid_info = {
     'archive': False,
     'spat': False,
     'mask': False,
+    'index': False,
     'unc': False,
+    'unc_dtype': 'float32',
     'gc': config_check()
 }
 
+## ==============================================
+## copy a waffles config dictionary; the values are
+## either immutable or flat lists/dicts (datalists,
+## region, mod_args, gc), so copying those one level
+## down isolates the copy without a deepcopy.
+## ==============================================
+waffles_wg_copy = lambda wg: {k: copy.copy(v) if isinstance(v, (list, dict)) else v for k, v in wg.items()}
+
 ## ==============================================
 ## the default waffles config dictionary.
 ## lambda returns dictionary with default waffles
 ## ==============================================
-waffles_config = lambda: copy.deepcopy(_waffles_grid_info)
+waffles_config = lambda: waffles_wg_copy(_waffles_grid_info)
     
-def waffles_dict2wg(wg = _waffles_grid_info):
-    '''copy the `wg` dict and add any missing keys.
-    also validate the key values and return the valid waffles_config
-    
-    returns a complete and validated waffles_config dict.'''
+## ==============================================
+## waffles_dict2wg defaults and value validators
+## ==============================================
+_waffles_wg_defaults = {
+    'datalist': None, 'region': None, 'inc': None, 'name': 'waffles_dem', 'name_prefix': None,
+    'node': 'pixel', 'fmt': 'GTiff', 'extend': 0, 'extend_proc': 10, 'weights': None,
+    'upper_limit': None, 'lower_limit': None, 'fltr': None, 'sample': None, 'clip': None,
+    'chunk': None, 'epsg': 4326, 'mod': 'help', 'mod_args': (), 'verbose': False,
+    'archive': False, 'spat': False, 'mask': False, 'index': False, 'unc': False, 'unc_dtype': 'float32',
+}
+_waffles_wg_bool = lambda v: False if not v or str(v).lower() == 'false' else True
+_waffles_wg_coerce = {
+    'inc': lambda v: gmt_inc2inc(str(v)),
+    'sample': lambda v: gmt_inc2inc(str(v)),
+    'extend': lambda v: int_or(v, 0),
+    'extend_proc': lambda v: int_or(v, 10),
+    'chunk': lambda v: int_or(v, None),
+    'epsg': lambda v: int_or(v, 4326),
+    'verbose': _waffles_wg_bool,
+    'archive': _waffles_wg_bool,
+    'spat': _waffles_wg_bool,
+    'mask': _waffles_wg_bool,
+    'index': _waffles_wg_bool,
+    'unc': _waffles_wg_bool,
+    'unc_dtype': lambda v: 'int16' if str(v).lower() == 'int16' else 'float32',
+}
+
+def _waffles_wg_validate(wg = _waffles_grid_info):
+    '''copy the `wg` dict, add any missing keys and validate the
+    key values; the region-independent part of waffles_dict2wg.
+
+    returns the validated waffles_config dict, still to be
+    completed for its region with _waffles_wg_set_region.'''
 
-    wg = copy.deepcopy(wg)
-    keys = wg.keys()
+    wg = waffles_wg_copy(wg)
     ## ==============================================
-    ## check the waffles config dict and set
-    ## missing values and their defaults.
+    ## validate the given values and set the
+    ## missing values to their defaults.
     ## ==============================================
-    if 'datalist' not in keys: wg['datalist'] = None
-    if 'datalists' not in keys:
+    for key in _waffles_wg_coerce.keys() & wg.keys():
+        wg[key] = _waffles_wg_coerce[key](wg[key])
+    wg = dict(_waffles_wg_defaults, **wg)
+    if 'datalists' not in wg.keys():
         if wg['datalist'] is not None:
             wg['datalists'] = [x[0] for x in datalist2py(wg['datalist'])]
         else: wg['datalists'] = None
-    if 'region' not in keys: wg['region'] = None
-    if 'inc' not in keys: wg['inc'] = None
-    else: wg['inc'] = gmt_inc2inc(str(wg['inc']))
-    if 'name' not in keys: wg['name'] = 'waffles_dem'
-    if 'name_prefix' not in keys: wg['name_prefix'] = None
-    if 'node' not in keys: wg['node'] = 'pixel'
-    if 'fmt' not in keys: wg['fmt'] = 'GTiff'
-    if 'extend' not in keys: wg['extend'] = 0
-    else: wg['extend'] = int_or(wg['extend'], 0)
-    if 'extend_proc' not in keys: wg['extend_proc'] = 10
-    else: wg['extend_proc'] = int_or(wg['extend_proc'], 10)
-    if 'weights' not in keys: wg['weights'] = None
-    if 'upper_limit' not in keys: wg['upper_limit'] = None
-    if 'lower_limit' not in keys: wg['lower_limit'] = None
-    if 'fltr' not in keys: wg['fltr'] = None
-    if 'sample' not in keys: wg['sample'] = None
-    else: wg['sample'] = gmt_inc2inc(str(wg['sample']))
-    if 'clip' not in keys: wg['clip'] = None
-    if 'chunk' not in keys: wg['chunk'] = None
-    else: wg['chunk'] = int_or(wg['chunk'], None)
-    if 'epsg' not in keys: wg['epsg'] = 4326
-    else: wg['epsg'] = int_or(wg['epsg'], 4326)
-    if 'mod' not in keys: wg['mod'] = 'help'
-    if 'mod_args' not in keys: wg['mod_args'] = ()
-    if 'verbose' not in keys: wg['verbose'] = False
-    else: wg['verbose'] = False if not wg['verbose'] or str(wg['verbose']).lower() == 'false' or wg['verbose'] is None else True
-    if 'archive' not in keys: wg['archive'] = False
-    else: wg['archive'] = False if not wg['archive'] or str(wg['archive']).lower() == 'false' or wg['archive'] is None else True
-    if 'spat' not in keys: wg['spat'] = False
-    else: wg['spat'] = False if not wg['spat'] or str(wg['spat']).lower() == 'false' or wg['spat'] is None else True
-    if 'mask' not in keys: wg['mask'] = False
-    else: wg['mask'] = False if not wg['mask'] or str(wg['mask']).lower() == 'false' or wg['mask'] is None else True
-    if 'unc' not in keys: wg['unc'] = False
-    else: wg['unc'] = False if not wg['unc'] or str(wg['unc']).lower() == 'false' or wg['unc'] is None else True
     wg['gc'] = config_check()
+    return(wg)
+
+def _waffles_wg_set_region(wg, region):
+    '''copy the validated waffles_config `wg` (see _waffles_wg_validate)
+    and complete it for `region`; the major datalist, the region (from
+    the datalist if `region` is None), the increment and the name all
+    depend on the region.
+
+    returns a complete and validated waffles_config dict.'''
+
+    wg = waffles_wg_copy(wg)
+    wg['region'] = region
     
     ## ==============================================
     ## set the major datalist to the mentioned
@@ -2767,7 +3429,8 @@ def waffles_dict2wg(wg = _waffles_grid_info):
     ## note: the vdatum module doesn't need a datalist
     ## ==============================================
     if wg['datalist'] is None and len(wg['datalists']) > 0:
-        wg['datalist'] = datalist_major(wg['datalists'], region = wg['region'])
+        major = '.mjr.datalist' if wg['region'] is None else '.{}.mjr.datalist'.format(region_format(wg['region'], 'fn'))
+        wg['datalist'] = datalist_major(wg['datalists'], major = major, region = wg['region'])
     if wg['mod'].lower() != 'vdatum':
         if wg['datalist'] is None:
             echo_error_msg('invalid datalist/s entry')
@@ -2793,15 +3456,27 @@ def waffles_dict2wg(wg = _waffles_grid_info):
         wg['name'] = waffles_append_fn(wg['name_prefix'], wg['region'], wg['sample'] if wg['sample'] is not None else wg['inc'])        
     return(wg)
 
+def waffles_dict2wg(wg = _waffles_grid_info):
+    '''copy the `wg` dict and add any missing keys.
+    also validate the key values and return the valid waffles_config
+    
+    returns a complete and validated waffles_config dict.'''
+
+    wg = _waffles_wg_validate(wg)
+    return(_waffles_wg_set_region(wg, wg['region']))
+
 _waffles_modules = {
     'surface': [lambda args: waffles_gmt_surface(**args), '''SPLINE DEM via GMT surface
     \t\t\t  < surface:tension=.35:relaxation=1.2:lower_limit=d:upper_limit=d >
     \t\t\t  :tension=[0-1] - Spline tension.'''],
-    'triangulate': [lambda args: waffles_gmt_triangulate(**args), '''TRIANGULATION DEM via GMT triangulate'''],
-    'nearest': [lambda args: waffles_nearneighbor(**args), '''NEAREST NEIGHBOR DEM via GMT or gdal_grid
-    \t\t\t  < nearest:radius=6s:use_gdal=False >
+    'triangulate': [lambda args: waffles_triangulate(**args), '''TRIANGULATION DEM via numpy/scipy or GMT triangulate
+    \t\t\t  < triangulate:use_gmt=False >
+    \t\t\t  :use_gmt=[True/False] - use GMT triangulate'''],
+    'nearest': [lambda args: waffles_nearneighbor(**args), '''NEAREST NEIGHBOR DEM via numpy/scipy, GMT or gdal_grid
+    \t\t\t  < nearest:radius=6s:use_gdal=False:use_gmt=False >
     \t\t\t  :radius=[value] - Nearest Neighbor search radius
-    \t\t\t  :use_gdal=[True/False] - use gdal grid nearest algorithm'''],
+    \t\t\t  :use_gdal=[True/False] - use gdal grid nearest algorithm
+    \t\t\t  :use_gmt=[True/False] - use GMT nearneighbor'''],
     'num': [lambda args: waffles_num(**args), '''Uninterpolated DEM populated by <mode>.
     \t\t\t  < num:mode=n >
     \t\t\t  :mode=[key] - specify mode of grid population: k (mask), m (mean) or n (num)'''],
@@ -2816,8 +3491,8 @@ _waffles_modules = {
     \t\t\t  :tension=[0-100] - Spline tension.
     \t\t\t  :dist=[value] - MBgrid -C switch (distance to fill nodata with spline)
     \t\t\t  :use_datalists=[True/False] - use waffles built-in datalists'''],
-    'invdst': [lambda args: waffles_invdst(**args), '''INVERSE DISTANCE DEM via gdal_grid
-    \t\t\t  < invdst:power=2.0:smoothing=0.0:radus1=0.1:radius2:0.1 >'''],
+    'invdst': [lambda args: waffles_invdst(**args), '''INVERSE DISTANCE DEM via numpy/scipy or gdal_grid
+    \t\t\t  < invdst:power=2.0:smoothing=0.0:radus1=0.1:radius2:0.1:use_gdal=False >'''],
     'average': [lambda args: waffles_moving_average(**args), '''Moving AVERAGE DEM via gdal_grid
     \t\t\t  < average:radius1=0.01:radius2=0.01 >'''],
     'help': [lambda args: waffles_help(**args), '''display module info'''],
@@ -2831,23 +3506,51 @@ _waffles_modules = {
 
 ## ==============================================
 ## module descriptors (used in cli help)
+## the descriptors are built once per modules dict and
+## kept in `_waffles_usage_cache`, keyed by the dict id.
 ## ==============================================
-_waffles_module_long_desc = lambda x: 'waffles modules:\n% waffles ... -M <mod>:key=val:key=val...\n\n  ' + '\n  '.join(['{:22}{}\n'.format(key, x[key][-1]) for key in x]) + '\n'
-_waffles_module_short_desc = lambda x: ', '.join(['{}'.format(key) for key in x])
+_waffles_usage_cache = {}
+
+def _waffles_module_long_desc(x):
+    c_key = ('long', id(x))
+    if c_key not in _waffles_usage_cache.keys():
+        _waffles_usage_cache[c_key] = 'waffles modules:\n% waffles ... -M <mod>:key=val:key=val...\n\n  ' + '\n  '.join(['{:22}{}\n'.format(key, x[key][-1]) for key in x]) + '\n'
+    return(_waffles_usage_cache[c_key])
+
+def _waffles_module_short_desc(x):
+    c_key = ('short', id(x))
+    if c_key not in _waffles_usage_cache.keys():
+        _waffles_usage_cache[c_key] = ', '.join(['{}'.format(key) for key in x])
+    return(_waffles_usage_cache[c_key])
+
+## ==============================================
+## the proc/dist regions and their formatted strings
+## are cached, keyed by the region and buffer-value
+## ==============================================
+@functools.lru_cache(maxsize = 64)
+def _waffles_region_buffer(region, bv):
+    return(tuple(region_buffer(region, bv)))
+
+@functools.lru_cache(maxsize = 64)
+def _waffles_region_format(region, bv, t):
+    return(region_format(list(_waffles_region_buffer(region, bv)), t))
+
+_waffles_proc_key = lambda wg: (tuple(wg['region']), (wg['inc'] * wg['extend_proc']) + (wg['inc'] * wg['extend']))
+_waffles_dist_key = lambda wg: (tuple(wg['region']), (wg['inc'] * wg['extend']))
 
 ## ==============================================
 ## the "proc-region" region_buffer(wg['region'], (wg['inc'] * 20) + (wg['inc'] * wg['extend']))
 ## ==============================================
-waffles_proc_region = lambda wg: region_buffer(wg['region'], (wg['inc'] * wg['extend_proc']) + (wg['inc'] * wg['extend']))
-waffles_proc_str = lambda wg: region_format(waffles_proc_region(wg), 'gmt')
-waffles_proc_bbox = lambda wg: region_format(waffles_proc_region(wg), 'bbox')
-waffles_proc_ul_lr = lambda wg: region_format(waffles_proc_region(wg), 'ul_lr')
+waffles_proc_region = lambda wg: list(_waffles_region_buffer(*_waffles_proc_key(wg)))
+waffles_proc_str = lambda wg: _waffles_region_format(*_waffles_proc_key(wg), 'gmt')
+waffles_proc_bbox = lambda wg: _waffles_region_format(*_waffles_proc_key(wg), 'bbox')
+waffles_proc_ul_lr = lambda wg: _waffles_region_format(*_waffles_proc_key(wg), 'ul_lr')
 
 ## ==============================================
 ## the "dist-region" region_buffer(wg['region'], (wg['inc'] * wg['extend']))
 ## ==============================================
-waffles_dist_region = lambda wg: region_buffer(wg['region'], (wg['inc'] * wg['extend']))
-waffles_dist_ul_lr = lambda wg: region_format(waffles_dist_region(wg), 'ul_lr')
+waffles_dist_region = lambda wg: list(_waffles_region_buffer(*_waffles_dist_key(wg)))
+waffles_dist_ul_lr = lambda wg: _waffles_region_format(*_waffles_dist_key(wg), 'ul_lr')
 
 ## ==============================================
 ## the datalist dump function, to use in run_cmd()
@@ -2868,90 +3571,148 @@ def waffles_help(wg = _waffles_grid_info):
     sys.stderr.write(_waffles_module_long_desc(_waffles_modules))
     return(0, 0)
 
-def waffles_yield_datalist(wg = _waffles_grid_info):    
+def waffles_yield_datalist(wg = _waffles_grid_info, parallel = False):
+    '''yield the xyz data of the datalist of waffles config `wg` in its
+    processing region, generating the mask, spatial-metadata and archive
+    as set in `wg`. if `parallel` is True, the datalist entries are
+    parsed in a process pool (see datalist_yield_xyz).'''
+    
     wg['region'] = region_buffer(wg['region'], wg['inc'] * .5) if wg['node'] == 'grid' else wg['region']
     region = waffles_proc_region(wg)
-    dlh = lambda e: regions_intersect_ogr_p(region, inf_entry(e))
+    dlh = lambda e: regions_intersect_ogr_p(region, inf_entry_cached(e))
     if wg['upper_limit'] is not None or wg['lower_limit'] is not None:
-        dlh = lambda e: regions_intersect_ogr_p(region, inf_entry(e)) and z_region_pass(inf_entry(e), upper_limit = wg['upper_limit'], lower_limit = wg['lower_limit'])
+        dlh = lambda e: regions_intersect_ogr_p(region, inf_entry_cached(e)) and z_region_pass(inf_entry_cached(e), upper_limit = wg['upper_limit'], lower_limit = wg['lower_limit'])
         z_region = [wg['lower_limit'], wg['upper_limit']]
     else: z_region = None
     if wg['spat']:
         dly = waffles_spat_meta(wg, dlh)
-    else:  dly = datalist_yield_xyz(wg['datalist'], pass_h = dlh, wt = 1 if wg['weights'] else None, region = region, archive = wg['archive'], verbose = wg['verbose'], z_region = z_region)
+    else:  dly = datalist_yield_xyz(wg['datalist'], pass_h = dlh, wt = 1 if wg['weights'] else None, region = region, archive = wg['archive'], verbose = wg['verbose'], z_region = z_region, index = wg['index'], parallel = parallel)
     if wg['mask']: dly = gdal_xyz_mask(dly, '{}_msk.tif'.format(wg['name']), region, wg['inc'], dst_format = wg['fmt'])
     for xyz in dly:
         yield(xyz)
     if wg['spat']: sm_ds = None
     if wg['archive']:
         a_dl = os.path.join('archive', '{}.datalist'.format(wg['name']))
-
-        for dir_, _, files in os.walk('archive'):
-            for f in files:
-                if '.datalist' in f:
-                    rel_dir = os.path.relpath(dir_, 'archive')
-                    rel_file = os.path.join(rel_dir, f)
-                    datalist_append_entry([rel_file, -1, 1], a_dl)
+        datalist_archive_datalist('archive', a_dl)
 
 def waffles_dump_datalist(wg = _waffles_grid_info, dst_port = sys.stdout):
-    '''dump the xyz data from datalist and generate a data mask while doing it.'''
-
-    for xyz in waffles_yield_datalist(wg):
-        xyz_line(xyz, dst_port, True)
+    '''dump the xyz data from datalist and generate a data mask while doing it.
+    the data is gathered into numpy batches and written a batch at a time;
+    a batch only holds consecutive points with the same number of
+    columns (e.g. entries with and without weights).'''
+
+    if dst_port is sys.stdout:
+        sys.stdout.flush()
+        out_port = io.BufferedWriter(sys.stdout.buffer, buffer_size = 1048576)
+    else: out_port = dst_port
+    try:
+        for cols, xyzs in itertools.groupby(waffles_yield_datalist(wg, parallel = True), key = len):
+            for xyz_arr in xyz_np_batches(xyzs, cols = cols):
+                xyz_np_lines(xyz_arr, out_port, True)
+    finally:
+        if out_port is not dst_port:
+            out_port.flush()
+            out_port.detach()
         
 def waffles_datalists(wg = _waffles_grid_info, dump = False, echo = False, infos = False, recurse = True):
     '''dump the xyz data from datalist and generate a data mask while doing it.'''
 
     if echo: datalist_list(wg)
-    if infos: print(datalist_inf(wg['datalist'], inf_file = True))
+    if infos:
+        ## ==============================================
+        ## scan the data entries concurrently; datalist_inf
+        ## then picks up their (cached) regions. gdal entries
+        ## are left to datalist_inf, which regenerates their inf.
+        ## an entry listed more than once is only scanned
+        ## once, so no two threads write the same `.inf`.
+        ## ==============================================
+        inf_entries = list({(e[0], e[1]): e for e in datalist(wg['datalist']) if e[1] in _dl_inf_h.keys() and e[1] != -1 and e[1] != 200}.values())
+        with concurrent.futures.ThreadPoolExecutor(max_workers = min(32, os.cpu_count() * 4)) as executor:
+            for entry_inf in executor.map(inf_entry_cached, inf_entries): pass
+        print(datalist_inf(wg['datalist'], inf_file = True))
     if dump:
         recurse = True
         pass_func = lambda xyz: xyz_line(xyz, sys.stdout, True)
     else: pass_func = lambda xyz: None
 
     if recurse:
-        for xyz in waffles_yield_datalist(wg): pass_func(xyz)
+        for xyz in waffles_yield_datalist(wg, parallel = dump): pass_func(xyz)
     return(0,0)
 
-def waffles_polygonize_datalist(wg, entry, layer = None, dlh = lambda e: True,
-                                v_fields = ['Name', 'Agency', 'Date', 'Type', 'Resolution', 'HDatum', 'VDatum', 'URL']):
-    '''polygonize the datalist entry given options from waffles-config wg.
-    the layer should be the major ogr layer to append polygon to.'''
+def _waffles_polygonize_mask(args):
+    '''polygonize and union the data mask grid `ng`; top-level so it can
+    be sent to a worker pool. the mask grid and the temporary polygons
+    are in their own temporary directory (see _waffles_polygonize_yield),
+    which is removed when done.
+    `args` is [ng, name, verbose]
+
+    returns the wkt of the unioned mask polygon or None'''
+
+    ng, name, verbose = args
+    tmp_dir = os.path.dirname(ng)
+    out_wkt = None
+    if gdal_infos(ng, True)['zr'][1] == 1:
+        tmp_ds = ogr.GetDriverByName('ESRI Shapefile').CreateDataSource(os.path.join(tmp_dir, '{}_poly.shp'.format(name)))
+        tmp_layer = tmp_ds.CreateLayer('{}_poly'.format(name), None, ogr.wkbMultiPolygon)
+        tmp_layer.CreateField(ogr.FieldDefn('DN', ogr.OFTInteger))
+        gdal_polygonize(ng, tmp_layer, verbose = verbose)
+
+        if len(tmp_layer) > 1:
+            out_feat = gdal_ogr_mask_union(tmp_layer, 'DN')
+            out_wkt = out_feat.geometry().ExportToWkt()
+        tmp_ds = tmp_layer = out_feat = None
+    shutil.rmtree(tmp_dir, ignore_errors = True)
+    return(out_wkt)
 
-    if layer is not None:
-        defn = layer.GetLayerDefn()
-    else: defn = None
+def _waffles_polygonize_feature(layer, wkt, o_v_fields, v_fields = ['Name', 'Agency', 'Date', 'Type', 'Resolution', 'HDatum', 'VDatum', 'URL']):
+    '''add the polygon `wkt` with the field values `o_v_fields` to the ogr `layer`'''
+    
+    out_feat = ogr.Feature(layer.GetLayerDefn())
+    out_feat.SetGeometry(ogr.CreateGeometryFromWkt(wkt))
+    [out_feat.SetField(f, o_v_fields[i]) for i, f in enumerate(v_fields)]
+    layer.CreateFeature(out_feat)
+    out_feat = None
+
+def _waffles_polygonize_yield(wg, entry, dlh = lambda e: True):
+    '''set up the polygonization of datalist entry `entry`
+
+    returns [mask-grid, name, verbose, field-values, xyz-generator]; the data mask
+    grid is written, as the xyz-generator is consumed, to a temporary directory
+    of its own, so entries with the same name (or concurrent runs) don't collide.'''
+    
+    import tempfile
     twg = waffles_dict2wg(wg)
     twg['datalist'] = entry[0]
     twg['name'] = os.path.basename(entry[0]).split('.')[0]
     twg['region'] = region_buffer(wg['region'], wg['inc'] * .5) if wg['node'] == 'grid' else wg['region']
     twg['inc'] = gmt_inc2inc('.3333333s') if twg['inc'] < gmt_inc2inc('.3333333s') else twg['inc']
-    ng = '{}_msk.tif'.format(twg['name'])
+    ng = os.path.join(tempfile.mkdtemp(prefix = '{}_'.format(twg['name']), dir = '.'), '{}_msk.tif'.format(twg['name']))
     if len(entry[3]) == 8:
         o_v_fields = entry[3]
     else: o_v_fields = [twg['name'], 'Unknown', '0', 'xyz_elevation', 'Unknown', 'WGS84', 'NAVD88', 'URL']
-    dly = datalist_yield_xyz(entry[0], pass_h = dlh, wt = 1 if twg['weights'] else None, region = waffles_proc_region(twg), archive = twg['archive'], verbose = twg['verbose'])
-    for xyz in gdal_xyz_mask(dly, ng, waffles_dist_region(twg), twg['inc'], dst_format = twg['fmt']):
-        yield(xyz)
+    dly = datalist_yield_xyz(entry[0], pass_h = dlh, wt = 1 if twg['weights'] else None, region = waffles_proc_region(twg), archive = twg['archive'], verbose = twg['verbose'], index = twg['index'])
+    return(ng, twg['name'], twg['verbose'], o_v_fields, gdal_xyz_mask(dly, ng, waffles_dist_region(twg), twg['inc'], dst_format = twg['fmt']))
 
-    if gdal_infos(ng, True)['zr'][1] == 1:
-        tmp_ds = ogr.GetDriverByName('ESRI Shapefile').CreateDataSource('{}_poly.shp'.format(twg['name']))
-        tmp_layer = tmp_ds.CreateLayer('{}_poly'.format(twg['name']), None, ogr.wkbMultiPolygon)
-        tmp_layer.CreateField(ogr.FieldDefn('DN', ogr.OFTInteger))
-        gdal_polygonize(ng, tmp_layer, verbose = twg['verbose'])
+def waffles_polygonize_datalist(wg, entry, layer = None, dlh = lambda e: True,
+                                v_fields = ['Name', 'Agency', 'Date', 'Type', 'Resolution', 'HDatum', 'VDatum', 'URL']):
+    '''polygonize the datalist entry given options from waffles-config wg.
+    the layer should be the major ogr layer to append polygon to.'''
 
-        if len(tmp_layer) > 1:
-            if defn is None: defn = tmp_layer.GetLayerDefn()
-            out_feat = gdal_ogr_mask_union(tmp_layer, 'DN', defn)
-            [out_feat.SetField(f, o_v_fields[i]) for i, f in enumerate(v_fields)]
-            layer.CreateFeature(out_feat)
+    ng, name, verbose, o_v_fields, dly = _waffles_polygonize_yield(wg, entry, dlh)
+    for xyz in dly:
+        yield(xyz)
 
-        tmp_ds = tmp_layer = out_feat = None
-        if layer is not None:
-            remove_glob('{}_poly.*'.format(twg['name']))
-    remove_glob(ng)
+    out_wkt = _waffles_polygonize_mask([ng, name, verbose])
+    if out_wkt is not None and layer is not None:
+        _waffles_polygonize_feature(layer, out_wkt, o_v_fields, v_fields)
 
 def waffles_spat_meta(wg, dlh = lambda e: True):
+    '''generate the spatial metadata of the datalist while yielding its data.
+    the datalist masks are polygonized in a worker pool while the
+    data of the next datalist is processed; the polygons are added
+    to the output layer here.
+
+    yields the xyz data'''
 
     dst_vector = '{}_sm.shp'.format(wg['name'])
     dst_layer = '{}_sm'.format(wg['name'])
@@ -2966,13 +3727,30 @@ def waffles_spat_meta(wg, dlh = lambda e: True):
         [layer.CreateField(ogr.FieldDefn('{}'.format(f), t_fields[i])) for i, f in enumerate(v_fields)]
         [layer.SetFeature(feature) for feature in layer]
     else: layer = None
-    defn = layer.GetLayerDefn()
     
-    dlh_1 = lambda e: False if e[1] != -1 else regions_intersect_ogr_p(waffles_dist_region(wg), inf_entry(e))
-    for this_entry in datalist(wg['datalist'], pass_h = dlh_1, dl_proc_h = True, verbose = wg['verbose']):
-        if this_entry[1] == -1:
-            for xyz in waffles_polygonize_datalist(wg, this_entry, layer = layer, dlh = dlh):
-                yield(xyz)
+    dlh_1 = lambda e: False if e[1] != -1 else regions_intersect_ogr_p(waffles_dist_region(wg), inf_entry_cached(e))
+    pending = []
+    with multiprocessing.Pool(_waffles_workers()) as pool:
+        for this_entry in datalist(wg['datalist'], pass_h = dlh_1, dl_proc_h = True, verbose = wg['verbose']):
+            if this_entry[1] == -1:
+                ng, name, verbose, o_v_fields, dly = _waffles_polygonize_yield(wg, this_entry, dlh)
+                for xyz in dly:
+                    yield(xyz)
+                pending.append([pool.apply_async(_waffles_polygonize_mask, ([ng, name, verbose],)), o_v_fields])
+
+                ## ==============================================
+                ## add the finished polygons to the layer
+                ## ==============================================
+                for p in [x for x in pending if x[0].ready()]:
+                    out_wkt = p[0].get()
+                    if out_wkt is not None and layer is not None:
+                        _waffles_polygonize_feature(layer, out_wkt, p[1], v_fields)
+                    pending.remove(p)
+                    
+        for p in pending:
+            out_wkt = p[0].get()
+            if out_wkt is not None and layer is not None:
+                _waffles_polygonize_feature(layer, out_wkt, p[1], v_fields)
     ds = None
         
 def waffles_cudem(wg = _waffles_grid_info, upper_limit = 'd'):
@@ -3060,16 +3838,104 @@ def waffles_gmt_triangulate(wg = _waffles_grid_info):
              wg['inc'], wg['name'], waffles_gmt_reg_str(wg)))
     return(run_cmd(dem_tri_cmd, verbose = wg['verbose'], data_fun = waffles_dl_func(wg)))
 
-def waffles_nearneighbor(wg = _waffles_grid_info, radius = None, use_gdal = False):
-    '''genearte a DEM with GMT nearneighbor or gdal_grid nearest'''
+def _waffles_numpy_block(wg):
+    '''block-mean the datalist data of `wg` into its proc region.
+
+    returns a list of [region, numpy (N,3) array of blocked xyz]'''
+    
+    wg['region'] = region_buffer(wg['region'], wg['inc'] * .5) if wg['node'] == 'grid' else wg['region']
+    region = waffles_proc_region(wg)
+    dly = xyz_block(waffles_yield_datalist(wg), region, wg['inc'], weights = False if wg['weights'] is None else True)
+    pts = [xyz_arr for xyz_arr in xyz_np_batches(dly)]
+    pts = np.concatenate(pts) if len(pts) > 0 else np.empty((0, 3))
+    return([region, pts])
+
+def _waffles_grid_rows(dst_gt, xcount, ycount, chunk_rows = 256):
+    '''yield the cell-center coordinates of the grid `chunk_rows` rows at a time
+
+    yields [first row, number of rows, numpy (N,2) array of x/y]'''
+    
+    xs = np.arange(xcount)
+    for y0 in range(0, ycount, chunk_rows):
+        ys = np.arange(y0, min(y0 + chunk_rows, ycount))
+        gx, gy = np.meshgrid(xs, ys)
+        geo_x, geo_y = _affine_apply(dst_gt, gx.ravel(), gy.ravel())
+        yield([y0, len(ys), np.column_stack((geo_x, geo_y))])
+
+def waffles_numpy_triangulate(wg = _waffles_grid_info, nodata = -9999, chunk_rows = 256):
+    '''Generate a triangulated (linear) grid with numpy, using a scipy
+    Delaunay triangulation of the block-mean data and barycentric
+    interpolation of each cell inside the convex hull.'''
+
+    from scipy.spatial import Delaunay
+    region, pts = _waffles_numpy_block(wg)
+    xcount, ycount, dst_gt = gdal_region2gt(region, wg['inc'])
+    out_array = np.full((ycount, xcount), nodata, dtype = np.float32)
+    
+    if len(pts) > 2:
+        tri = Delaunay(pts[:,:2])
+        for y0, ny, xy in _waffles_grid_rows(dst_gt, xcount, ycount, chunk_rows):
+            simp = tri.find_simplex(xy)
+            inside = simp >= 0
+            vals = np.full(len(xy), nodata, dtype = np.float64)
+            if inside.any():
+                t = tri.transform[simp[inside]]
+                b = np.einsum('ijk,ik->ij', t[:,:2,:], xy[inside] - t[:,2,:])
+                bary = np.column_stack((b, 1 - b.sum(axis = 1)))
+                vals[inside] = (bary * pts[tri.simplices[simp[inside]], 2]).sum(axis = 1)
+            out_array[y0:y0 + ny,:] = vals.reshape(ny, xcount)
+        tri = None
+    pts = None
+
+    ds_config = gdal_set_infos(xcount, ycount, xcount * ycount, dst_gt, gdal_sr_wkt(wg['epsg']), gdal.GDT_Float32, nodata, 'GTiff')
+    out, status = gdal_write(out_array, '{}.tif'.format(wg['name']), ds_config)
+    return(0, status)
+
+def waffles_triangulate(wg = _waffles_grid_info, use_gmt = False):
+    '''generate a DEM with numpy/scipy (see waffles_numpy_triangulate)
+    or with GMT triangulate if `use_gmt` is True'''
+
+    if use_gmt and wg['gc']['GMT'] is not None:
+        return(waffles_gmt_triangulate(wg))
+    else: return(waffles_numpy_triangulate(wg))
+
+def waffles_numpy_nearneighbor(wg = _waffles_grid_info, radius = None, nodata = -9999, chunk_rows = 256):
+    '''Generate a nearest neighbor grid with numpy, using a scipy cKDTree
+    to find the nearest block-mean point within `radius` of each cell.'''
+
+    from scipy.spatial import cKDTree
+    region, pts = _waffles_numpy_block(wg)
+    radius = wg['inc'] * 2 if radius is None else radius
+    xcount, ycount, dst_gt = gdal_region2gt(region, wg['inc'])
+    out_array = np.full((ycount, xcount), nodata, dtype = np.float32)
+
+    if len(pts) > 0:
+        tree = cKDTree(pts[:,:2])
+        for y0, ny, xy in _waffles_grid_rows(dst_gt, xcount, ycount, chunk_rows):
+            d, idx = tree.query(xy, k = 1, distance_upper_bound = radius)
+            valid = np.isfinite(d)
+            vals = np.full(len(xy), nodata, dtype = np.float64)
+            vals[valid] = pts[idx[valid], 2]
+            out_array[y0:y0 + ny,:] = vals.reshape(ny, xcount)
+        tree = None
+    pts = None
+
+    ds_config = gdal_set_infos(xcount, ycount, xcount * ycount, dst_gt, gdal_sr_wkt(wg['epsg']), gdal.GDT_Float32, nodata, 'GTiff')
+    out, status = gdal_write(out_array, '{}.tif'.format(wg['name']), ds_config)
+    return(0, status)
+
+def waffles_nearneighbor(wg = _waffles_grid_info, radius = None, use_gdal = False, use_gmt = False):
+    '''genearte a DEM with numpy/scipy (see waffles_numpy_nearneighbor),
+    GMT nearneighbor if `use_gmt` is True or gdal_grid nearest if `use_gdal` is True'''
     
     radius = wg['inc'] * 2 if radius is None else gmt_inc2inc(radius)
-    if wg['gc']['GMT'] is not None and not use_gdal:
+    if use_gmt and wg['gc']['GMT'] is not None and not use_gdal:
         dem_nn_cmd = ('gmt blockmean {} -I{:.10f}{} -V {} | gmt nearneighbor {} -I{:.10f} -S{} -V -G{}.tif=gd+n-9999:GTiff {}\
         '.format(waffles_proc_str(wg), wg['inc'], ' -Wi' if wg['weights'] else '', waffles_gmt_reg_str(wg), waffles_proc_str(wg), \
                  wg['inc'], radius, wg['name'], waffles_gmt_reg_str(wg)))
         return(run_cmd(dem_nn_cmd, verbose = wg['verbose'], data_fun = waffles_dl_func(wg)))
-    else: return(waffles_gdal_grid(wg, 'nearest:radius1={}:radius2={}:nodata=-9999'.format(radius, radius)))
+    elif use_gdal: return(waffles_gdal_grid(wg, 'nearest:radius1={}:radius2={}:nodata=-9999'.format(radius, radius)))
+    else: return(waffles_numpy_nearneighbor(wg, radius = radius))
     
 def waffles_num(wg = _waffles_grid_info, mode = 'n'):
     '''Generate an uninterpolated num grid.
@@ -3079,7 +3945,7 @@ def waffles_num(wg = _waffles_grid_info, mode = 'n'):
     
     wg['region'] = region_buffer(wg['region'], wg['inc'] * .5) if wg['node'] == 'grid' else wg['region']
     region = waffles_proc_region(wg)
-    dlh = lambda e: regions_intersect_ogr_p(region, inf_entry(e))
+    dlh = lambda e: regions_intersect_ogr_p(region, inf_entry_cached(e))
     dly = waffles_yield_datalist(wg)
     if wg['weights']: dly = xyz_block(dly, region, wg['inc'], weights = True if wg['weights'] else False)
     return(gdal_xyz2gdal(dly, '{}.tif'.format(wg['name']), region, wg['inc'], dst_format = wg['fmt'], mode = mode, verbose = wg['verbose']))
@@ -3091,25 +3957,84 @@ def waffles_gdal_grid(wg = _waffles_grid_info, alg_str = 'linear:radius=1'):
     
     wg['region'] = region_buffer(wg['region'], wg['inc'] * .5) if wg['node'] == 'grid' else wg['region']
     region = waffles_proc_region(wg)
-    dlh = lambda e: regions_intersect_ogr_p(region, inf_entry(e))
+    dlh = lambda e: regions_intersect_ogr_p(region, inf_entry_cached(e))
     wt = 1 if wg['weights'] is not None else None
     dly = xyz_block(waffles_yield_datalist(wg), region, wg['inc'], weights = False if wg['weights'] is None else True)
-    ds = xyz2gdal_ds(dly, '{}'.format(wg['name']))
+
+    ## ==============================================
+    ## pass the points to gdal_grid through an in-memory
+    ## csv/vrt; fall back to building the features one by one
+    ## if the CSV or VRT drivers are missing.
+    ## ==============================================
+    vsi_fns = []
+    if ogr.GetDriverByName('CSV') is not None and ogr.GetDriverByName('OGR_VRT') is not None:
+        vsi_fns = xyz2gdal_vsimem(dly, os.path.basename(wg['name']))
+        ds = gdal.OpenEx(vsi_fns[0], gdal.OF_VECTOR)
+    else: ds = xyz2gdal_ds(dly, '{}'.format(wg['name']))
     xcount, ycount, dst_gt = gdal_region2gt(region, wg['inc'])
     gd_opts = gdal.GridOptions(outputType = gdal.GDT_Float32, noData = -9999, format = 'GTiff', \
                                width = xcount, height = ycount, algorithm = alg_str, callback = _gdal_progress if wg['verbose'] else None, \
                                outputBounds = [region[0], region[3], region[1], region[2]])
     gdal.Grid('{}.tif'.format(wg['name']), ds, options = gd_opts)
     ds = None
+    for vsi_fn in vsi_fns: gdal.Unlink(vsi_fn)
     gdal_set_nodata('{}.tif'.format(wg['name']), -9999)
     return(0, 0)
 
+def waffles_numpy_idw(wg = _waffles_grid_info, power = 2.0, smoothing = 0.0, radius = None, \
+                      max_points = 0, min_points = 0, nodata = -9999, k = 12, chunk_rows = 256):
+    '''Generate an inverse distance grid with numpy, using a scipy cKDTree
+    to find the (at most `max_points`, or `k` if 0) nearest points within
+    `radius` of each cell. the grid is filled `chunk_rows` rows at a time.'''
+
+    from scipy.spatial import cKDTree
+    region, pts = _waffles_numpy_block(wg)
+    radius = wg['inc'] * 2 if radius is None else radius
+    xcount, ycount, dst_gt = gdal_region2gt(region, wg['inc'])
+    out_array = np.full((ycount, xcount), nodata, dtype = np.float32)
+    
+    if len(pts) > 0:
+        tree = cKDTree(pts[:,:2])
+        k = min(max_points if max_points > 0 else k, len(pts))
+        for y0, ny, xy in _waffles_grid_rows(dst_gt, xcount, ycount, chunk_rows):
+            d, idx = tree.query(xy, k = k, distance_upper_bound = radius)
+            if k == 1: d, idx = d[:,None], idx[:,None]
+            valid = np.isfinite(d)
+            idx[~valid] = 0
+            if smoothing > 0: d = np.sqrt(d ** 2 + smoothing ** 2)
+            z = pts[idx, 2]
+            with np.errstate(divide = 'ignore', invalid = 'ignore'):
+                w = np.where(valid, 1. / np.power(d, power), 0)
+                vals = (w * z).sum(axis = 1) / w.sum(axis = 1)
+
+            ## ==============================================
+            ## cells on a data point take its value
+            ## ==============================================
+            exact = valid & (d == 0)
+            on_pt = exact.any(axis = 1)
+            vals[on_pt] = z[on_pt, exact[on_pt].argmax(axis = 1)]
+            
+            n_valid = valid.sum(axis = 1)
+            vals[(n_valid == 0) | (n_valid < min_points)] = nodata
+            out_array[y0:y0 + ny,:] = vals.reshape(ny, xcount)
+        tree = None
+    pts = None
+        
+    ds_config = gdal_set_infos(xcount, ycount, xcount * ycount, dst_gt, gdal_sr_wkt(wg['epsg']), gdal.GDT_Float32, nodata, 'GTiff')
+    out, status = gdal_write(out_array, '{}.tif'.format(wg['name']), ds_config)
+    return(0, status)
+
 def waffles_invdst(wg = _waffles_grid_info, power = 2.0, smoothing = 0.0, radius1 = None, radius2 = None, angle = 0.0, \
-                   max_points = 0, min_points = 0, nodata = -9999):
-    '''Generate an inverse distance grid with GDAL'''
+                   max_points = 0, min_points = 0, nodata = -9999, use_gdal = False):
+    '''Generate an inverse distance grid with numpy/scipy (see waffles_numpy_idw)
+    or with GDAL if `use_gdal` is True, the search ellipse is not a circle
+    or the radius is 0 (GDAL then uses all the points for each cell).'''
     
     radius1 = wg['inc'] * 2 if radius1 is None else gmt_inc2inc(radius1)
     radius2 = wg['inc'] * 2 if radius2 is None else gmt_inc2inc(radius2)
+    if not _waffles_wg_bool(use_gdal) and radius1 == radius2 and radius1 > 0:
+        return(waffles_numpy_idw(wg, power = float(power), smoothing = float(smoothing), radius = radius1, \
+                                 max_points = int_or(max_points, 0), min_points = int_or(min_points, 0), nodata = float(nodata)))
     gg_mod = 'invdist:power={}:smoothing={}:radius1={}:radius2={}:angle={}:max_points={}:min_points={}:nodata={}'\
                              .format(power, smoothing, radius1, radius2, angle, max_points, min_points, nodata)
     return(waffles_gdal_grid(wg, gg_mod))
@@ -3173,6 +4098,117 @@ _unc_config = {
 
 waffles_unc_config = lambda: copy.deepcopy(_unc_config)
 
+## ==============================================
+## the uncertainty DEM and mask, opened once in
+## each split-sample worker process
+## ==============================================
+_split_sample_ds = {}
+
+def _waffles_split_sample_init(dem, msk):
+    '''split-sample worker initializer; open the DEM and mask once per process'''
+    
+    _split_sample_ds['dem'] = gdal.Open(dem)
+    if msk is not None: _split_sample_ds['msk'] = gdal.Open(msk)
+
+def _waffles_split_sample(args):
+    '''perform a split-sample analysis on a training sub-region;
+    top-level so it can be sent to a worker pool. runs in its own
+    temporary directory, which is removed when done.
+    `args` is [n, sub-region, sample-density, unc-config]
+
+    returns the error/distance/slope data of the sub-region or None'''
+
+    import tempfile
+    n, sub_region, ss_samp, uc = args
+    rng = np.random.default_rng()
+    this_region = sub_region[0]
+    sub_dp = None
+    this_dir = os.getcwd()
+    tmp_dir = tempfile.mkdtemp(prefix = 'sub_{}_'.format(n), dir = this_dir)
+    os.chdir(tmp_dir)
+    try:
+        out, status = run_cmd('gmt gmtset IO_COL_SEPARATOR = SPACE', verbose = False)
+        
+        ## ==============================================
+        ## extract the xyz data for the region from the DEM
+        ## ==============================================
+        o_xyz = '{}_{}.xyz'.format(uc['wg']['name'], n)
+        ds = _split_sample_ds['dem'] if 'dem' in _split_sample_ds.keys() else gdal.Open(uc['dem'])
+        msk_ds = _split_sample_ds['msk'] if 'msk' in _split_sample_ds.keys() else uc['msk']
+        with open(o_xyz, 'w') as o_fh:
+            for xyz_arr in xyz_np_batches(gdal_parse(ds, srcwin = gdal_srcwin(ds, region_buffer(this_region, (20 * uc['wg']['inc']))), mask = msk_ds)):
+                xyz_np_lines(xyz_arr, o_fh)
+        ds = msk_ds = None
+
+        if os.stat(o_xyz).st_size == 0:
+            echo_error_msg('no data in sub-region...')
+        else:
+            ## ==============================================
+            ## split the xyz data to inner/outer; outer is
+            ## the data buffer, inner will be randomly sampled
+            ## ==============================================
+            s_inner, s_outer = gmt_select_split(o_xyz, this_region, 'sub_{}'.format(n), verbose = False)
+            if os.stat(s_inner).st_size != 0:
+                with open(s_inner, 'r') as s_fh:
+                    s_cols = len(s_fh.readline().split())
+                sub_xyz = np.fromfile(s_inner, dtype = np.float64, sep = ' ').reshape(-1, s_cols)
+            else: sub_xyz = []
+            ss_len = len(sub_xyz)
+            if ss_samp is not None:
+                sx_cnt = int(sub_region[1] * (ss_samp / 100)) + 1
+            else: sx_cnt = 1
+            sub_xyz_head = 'sub_{}_head.xyz'.format(n)
+
+            ## ==============================================
+            ## randomly sample `sx_cnt` points as the head,
+            ## the rest are used to calculate the errors
+            ## ==============================================
+            if ss_len > 0:
+                h_idx = rng.choice(ss_len, size = min(sx_cnt, ss_len), replace = False)
+                r_msk = np.ones(ss_len, dtype = bool)
+                r_msk[h_idx] = False
+                sub_xyz_rest = sub_xyz[r_msk]
+                sub_xyz = sub_xyz[h_idx]
+                h_idx = r_msk = None
+            else: sub_xyz_rest = []
+            np.savetxt(sub_xyz_head, sub_xyz, '%f', ' ')
+
+            ## ==============================================
+            ## generate the random-sample DEM
+            ## ==============================================
+            wc = waffles_config()
+            wc['name'] = 'sub_{}'.format(n)
+            wc['datalists'] = [s_outer, sub_xyz_head]
+            wc['region'] = this_region
+            wc['inc'] = uc['wg']['inc']
+            wc['mod'] = uc['wg']['mod']
+            wc['verbose'] = False
+            wc['mod_args'] = uc['wg']['mod_args']
+            wc['mask'] = True
+            sub_dem = waffles_run(wc)
+            sub_msk = '{}_msk.tif'.format(wc['name'])
+
+            if os.path.exists(sub_dem) and os.path.exists(sub_msk):
+                ## ==============================================
+                ## generate the random-sample data PROX and SLOPE
+                ## ==============================================        
+                sub_prox = '{}_prox.tif'.format(wc['name'])
+                gdal_proximity(sub_msk, sub_prox)
+
+                sub_slp = '{}_slp.tif'.format(wc['name'])
+                gdal_slope(sub_dem, sub_slp)
+
+                ## ==============================================
+                ## Calculate the random-sample errors
+                ## ==============================================
+                sub_dp = gdal_query_multi(sub_xyz_rest, [sub_dem, sub_prox, uc['slp']])
+                sub_dp[:,2] -= sub_dp[:,3]
+                sub_dp = np.delete(sub_dp, 3, axis = 1)
+    finally:
+        os.chdir(this_dir)
+        shutil.rmtree(tmp_dir, ignore_errors = True)
+    return(sub_dp)
+
 def waffles_interpolation_uncertainty(uc = _unc_config):
     '''calculate the interpolation uncertainty
     - as related to distance to nearest measurement.
@@ -3192,9 +4228,7 @@ def waffles_interpolation_uncertainty(uc = _unc_config):
     num_sum, g_max, num_perc = gdal_mask_analysis(mask = uc['msk'])
 
     ## proximity analysis
-    prox_perc_95 = gdal_percentile(uc['prox'], 95)
-    prox_perc_90 = gdal_percentile(uc['prox'], 90)
-    prox_percentile = gdal_percentile(uc['prox'], uc['percentile'])
+    prox_perc_95, prox_perc_90, prox_percentile = gdal_percentile(uc['prox'], [95, 90, uc['percentile']])
 
     region_info[uc['wg']['name']] = [uc['wg']['region'], g_max, num_sum, num_perc, prox_percentile] 
     for x in region_info.keys():
@@ -3205,148 +4239,79 @@ def waffles_interpolation_uncertainty(uc = _unc_config):
     ## ==============================================
     echo_msg('chunking region into sub-regions using chunk level {}...'.format(uc['chnk_lvl']))
     chnk_inc = int(region_info[uc['wg']['name']][4] * uc['chnk_lvl'])
-    sub_regions = region_chunk(uc['wg']['region'], uc['wg']['inc'], chnk_inc)
-    echo_msg('chunked region into {} sub-regions.'.format(len(sub_regions)))
+    sub_regions = region_yield_chunk(uc['wg']['region'], uc['wg']['inc'], chnk_inc)
 
     ## ==============================================
     ## sub-region analysis
     ## ==============================================
-    echo_msg('analyzing {} sub-regions...'.format(len(sub_regions)))
+    echo_msg('analyzing sub-regions...')
     sub_zones = {}    
+    tmp_msk = '{}_sub_msk.tif'.format(uc['wg']['name'])
+    tmp_dem = '{}_sub_dem.tif'.format(uc['wg']['name'])
     for sc, sub_region in enumerate(sub_regions):
-        gdal_cut(uc['msk'], sub_region, 'tmp_msk.tif')
-        gdal_cut(uc['dem'], sub_region, 'tmp_dem.tif')
-        s_sum, s_g_max, s_perc = gdal_mask_analysis('tmp_msk.tif')
-        s_dc = gdal_infos('tmp_dem.tif', True)
+        gdal_cut(uc['msk'], sub_region, tmp_msk)
+        gdal_cut(uc['dem'], sub_region, tmp_dem)
+        s_sum, s_g_max, s_perc = gdal_mask_analysis(tmp_msk)
+        s_dc = gdal_infos(tmp_dem, True)
         zone = 'Bathy' if s_dc['zr'][1] < 0 else 'Topo' if s_dc['zr'][0] > 0 else 'BathyTopo'
         sub_zones[sc + 1] = [sub_region, s_g_max, s_sum, s_perc, s_dc['zr'][0], s_dc['zr'][1], zone]
-        remove_glob('tmp_*.tif')
+        for tmp_fn in [tmp_msk, tmp_dem]:
+            try:
+                os.remove(tmp_fn)
+            except: pass
         
-    s_dens = np.array([sub_zones[x][3] for x in sub_zones.keys()])
-    s_5perc = np.percentile(s_dens, 5)
-    s_dens = None
+    sz_keys = list(sub_zones.keys())
+    sz = np.array([tuple(sub_zones[x][3:6]) for x in sz_keys], dtype = [('perc', 'f8'), ('zmin', 'f8'), ('zmax', 'f8')])
+    s_5perc = np.percentile(sz['perc'], 5)
     echo_msg('Sampling density for region is: {:.16f}'.format(s_5perc))
 
     ## ==============================================
     ## zone analysis / generate training regions
+    ## zones are 0: Bathy, 1: BathyTopo and 2: Topo
     ## ==============================================
     trainers = []
-    bathy_tiles = [sub_zones[x] for x in sub_zones.keys() if sub_zones[x][6] == 'Bathy']
-    bathy_topo_tiles = [sub_zones[x] for x in sub_zones.keys() if sub_zones[x][6] == 'BathyTopo']
-    topo_tiles = [sub_zones[x] for x in sub_zones.keys() if sub_zones[x][6] == 'Topo']
-
-    for z, tile_set in enumerate([bathy_tiles, bathy_topo_tiles, topo_tiles]):
-        if len(tile_set) > 0:
-            t_dens = np.array([x[3] for x in tile_set])
-            t_50perc = np.percentile(t_dens, 50)
-        else: t_50perc = 0.0
+    sz_zone = np.where(sz['zmax'] < 0, 0, np.where(sz['zmin'] > 0, 2, 1))
+    for z in range(3):
+        z_msk = sz_zone == z
+        t_50perc = np.percentile(sz['perc'][z_msk], 50) if z_msk.any() else 0.0
         echo_msg('Minimum sampling for {} tiles: {}'.format(uc['zones'][z].upper(), t_50perc))
-        t_trainers = [x for x in tile_set if x[3] > t_50perc]
+        t_trainers = [sub_zones[sz_keys[i]] for i in np.nonzero(z_msk & (sz['perc'] > t_50perc))[0]]
         echo_msg('possible {} training zones: {}'.format(uc['zones'][z].upper(), len(t_trainers)))
         trainers.append(t_trainers)
+    sz = sz_zone = None
     trains = regions_sort(trainers)
     echo_msg('sorted training tiles.')
-    echo_msg('analyzed {} sub-regions.'.format(len(sub_regions)))
+    echo_msg('analyzed {} sub-regions.'.format(len(sub_zones)))
 
     ## ==============================================
     ## split-sample simulations and error calculations
+    ## the training regions are independent, so each
+    ## simulation runs them in a process pool.
     ## ==============================================
-    for sim in range(0, uc['sims']):
-        sys.stderr.write('\x1b[2K\rwaffles: performing SPLIT-SAMPLE simulation {} out of {} [{:3}%]'.format(sim + 1, uc['sims'], 0))
-        sys.stderr.flush()
-        status = 0
-        for z, train in enumerate(trains):
-            train_h = train[:25]
-            ss_samp = s_5perc
-
-            ## ==============================================
-            ## perform split-sample analysis on each training region.
-            ## ==============================================
-            for n, sub_region in enumerate(train_h):
-                perc = int(float(n+(len(train_h) * z))/(len(train_h)*len(trains)) * 100)
+    s_dp_chunks = []
+    uc_p = dict(uc)
+    for key in ['dem', 'msk', 'prox', 'slp']:
+        if uc_p[key] is not None: uc_p[key] = os.path.abspath(uc_p[key])
+    with concurrent.futures.ProcessPoolExecutor(max_workers = _waffles_workers(), initializer = _waffles_split_sample_init, \
+                                                initargs = (uc_p['dem'], uc_p['msk'])) as executor:
+        for sim in range(0, uc['sims']):
+            sys.stderr.write('\x1b[2K\rwaffles: performing SPLIT-SAMPLE simulation {} out of {} [{:3}%]'.format(sim + 1, uc['sims'], 0))
+            sys.stderr.flush()
+            ss_tasks = []
+            for z, train in enumerate(trains):
+                train_h = train[:25]
+                ss_samp = s_5perc
+                for n, sub_region in enumerate(train_h):
+                    if ss_samp is not None and sub_region[3] < ss_samp: ss_samp = None
+                    ss_tasks.append([n, sub_region, ss_samp, uc_p])
+
+            for n, sub_dp in enumerate(executor.map(_waffles_split_sample, ss_tasks)):
+                perc = int(float(n + 1) / len(ss_tasks) * 100)
                 sys.stderr.write('\x1b[2K\rwaffles: performing SPLIT-SAMPLE simulation {} out of {} [{:3}%]'.format(sim + 1, uc['sims'], perc))
-                this_region = sub_region[0]
-                if sub_region[3] < ss_samp: ss_samp = None
-
-                ## ==============================================
-                ## extract the xyz data for the region from the DEM
-                ## ==============================================
-                o_xyz = '{}_{}.xyz'.format(uc['wg']['name'], n)
-                ds = gdal.Open(uc['dem'])
-                with open(o_xyz, 'w') as o_fh:
-                    for xyz in gdal_parse(ds, srcwin = gdal_srcwin(ds, region_buffer(this_region, (20 * uc['wg']['inc']))), mask = uc['msk']):
-                        xyz_line(xyz, o_fh)
-                ds = None
-
-                if os.stat(o_xyz).st_size == 0:
-                    echo_error_msg('no data in sub-region...')
-                else:
-                    ## ==============================================
-                    ## split the xyz data to inner/outer; outer is
-                    ## the data buffer, inner will be randomly sampled
-                    ## ==============================================
-                    s_inner, s_outer = gmt_select_split(o_xyz, this_region, 'sub_{}'.format(n), verbose = False) #verbose = uc['wg']['verbose'])
-                    if os.stat(s_inner).st_size != 0:
-                        sub_xyz = np.loadtxt(s_inner, ndmin=2, delimiter = ' ')
-                    else: sub_xyz = []
-                    ss_len = len(sub_xyz)
-                    if ss_samp is not None:
-                        sx_cnt = int(sub_region[1] * (ss_samp / 100)) + 1
-                    else: sx_cnt = 1
-                    sub_xyz_head = 'sub_{}_head.xyz'.format(n)
-                    np.random.shuffle(sub_xyz)
-                    np.savetxt(sub_xyz_head, sub_xyz[:sx_cnt], '%f', ' ')
-
-                    ## ==============================================
-                    ## generate the random-sample DEM
-                    ## ==============================================
-                    wc = waffles_config()
-                    wc['name'] = 'sub_{}'.format(n)
-                    wc['datalists'] = [s_outer, sub_xyz_head]
-                    wc['region'] = this_region
-                    wc['inc'] = uc['wg']['inc']
-                    wc['mod'] = uc['wg']['mod']
-                    wc['verbose'] = False
-                    wc['mod_args'] = uc['wg']['mod_args']
-                    wc['mask'] = True
-                    sub_dem = waffles_run(wc)
-                    sub_msk = '{}_msk.tif'.format(wc['name'])
-                    
-                    if os.path.exists(sub_dem) and os.path.exists(sub_msk):
-                        ## ==============================================
-                        ## generate the random-sample data PROX and SLOPE
-                        ## ==============================================        
-                        sub_prox = '{}_prox.tif'.format(wc['name'])
-                        gdal_proximity(sub_msk, sub_prox)
-
-                        sub_slp = '{}_slp.tif'.format(wc['name'])
-                        gdal_slope(sub_dem, sub_slp)
-
-                        ## ==============================================
-                        ## Calculate the random-sample errors
-                        ## ==============================================
-                        sub_xyd = gdal_query(sub_xyz[sx_cnt:], sub_dem, 'xyd')
-                        #sub_dp = gdal_query(sub_xyd, sub_prox, 'zg')
-                        sub_dp = gdal_query(sub_xyd, sub_prox, 'xyzg')
-                        sub_ds = gdal_query(sub_dp, uc['slp'], 'g')
- 
-                        if len(sub_dp) > 0:
-                            if sub_dp.shape[0] == sub_ds.shape[0]:
-                                sub_dp = np.append(sub_dp, sub_ds, 1)
-                            else:
-                                print(n)
-                                print(sub_dp.shape)
-                                print(sub_ds.shape)
-                                sub_dp = []
-                    else: sub_dp = None
-                    remove_glob(sub_xyz_head)
-
-                    if s_dp is not None: 
-                        if sub_dp is not None and len(sub_dp) > 0:
-                            s_dp = np.concatenate((s_dp, sub_dp), axis = 0)
-                    else: s_dp = sub_dp
-                remove_glob(o_xyz)
-                remove_glob('sub_{}*'.format(n))
+                if sub_dp is not None and len(sub_dp) > 0:
+                    s_dp_chunks.append(sub_dp)
+    s_dp = np.concatenate(s_dp_chunks, axis = 0) if len(s_dp_chunks) > 0 else np.empty((0, 5))
+    s_dp_chunks = None
     echo_msg('ran INTERPOLATION uncertainty module using {}.'.format(uc['wg']['mod']))
 
     if len(s_dp) > 0:
@@ -3363,25 +4328,20 @@ def waffles_interpolation_uncertainty(uc = _unc_config):
         prox_err = s_dp[:,[2,3]]
         slp_err = s_dp[:,[2,4]]
         
-        np.savetxt('{}_prox.err'.format(uc['wg']['name']), prox_err, '%f', ' ')
-        np.savetxt('{}_slp.err'.format(uc['wg']['name']), slp_err, '%f', ' ')
+        np.save('{}_prox.err.npy'.format(uc['wg']['name']), prox_err)
+        np.save('{}_slp.err.npy'.format(uc['wg']['name']), slp_err)
 
-        ec_d = err2coeff(prox_err[:50000000], dst_name = uc['wg']['name'] + '_prox', xa = 'distance')
-        ec_s = err2coeff(slp_err[:50000000], dst_name = uc['wg']['name'] + '_slp', xa = 'slope')
+        ec_d = err2coeff(err_subsample(prox_err), dst_name = uc['wg']['name'] + '_prox', xa = 'distance')
+        ec_s = err2coeff(err_subsample(slp_err), dst_name = uc['wg']['name'] + '_slp', xa = 'slope')
 
         ## ==============================================
         ## apply error coefficient to full proximity grid
         ## ==============================================
         echo_msg('applying coefficient to proximity grid')
-        ## USE numpy instead
-        math_cmd = 'gmt grdmath {} 0 AND ABS {} POW {} MUL {} ADD = {}_prox_unc.tif=gd+n-9999:GTiff\
-        '.format(uc['prox'], ec_d[2], ec_d[1], 0, uc['wg']['name'])
-        run_cmd(math_cmd, verbose = uc['wg']['verbose'])
+        gdal_coeff_apply(uc['prox'], '{}_prox_unc.tif'.format(uc['wg']['name']), ec_d[2], ec_d[1], dtype = uc['wg']['unc_dtype'])
         echo_msg('applied coefficient {} to proximity grid'.format(ec_d))
         
-        math_cmd = 'gmt grdmath {} 0 AND ABS {} POW {} MUL {} ADD = {}_slp_unc.tif=gd+n-9999:GTiff\
-        '.format(uc['slp'], ec_s[2], ec_s[1], 0, uc['wg']['name'])
-        run_cmd(math_cmd, verbose = uc['wg']['verbose'])
+        gdal_coeff_apply(uc['slp'], '{}_slp_unc.tif'.format(uc['wg']['name']), ec_s[2], ec_s[1], dtype = uc['wg']['unc_dtype'])
         echo_msg('applied coefficient {} to slope grid'.format(ec_s))
         
     return([ec_d, ec_s])
@@ -3406,6 +4366,123 @@ def waffles_gdal_md(wg):
         ds = None
     else: echo_error_msg('failed to set metadata')
 
+def _waffles_run_chunk(region, wg, args_d):
+    '''generate the DEM of the chunk `region` of the waffles config `wg`
+    (see waffles_run); run by itself or in a worker process.
+
+    returns [chunk dem-fn, chunk mask-fn, chunk spat-fn, status]'''
+
+    this_wg = waffles_dict2wg(wg)
+    this_wg['region'] = region
+    this_wg['name'] = 'chunk_{}'.format(region_format(region, 'fn'))
+    this_dem = this_wg['name'] + '.tif'
+    this_dem_msk = this_wg['name'] + '_msk.tif' if this_wg['mask'] else None
+    this_dem_spat = '{}_sm.shp'.format(this_wg['name']) if this_wg['spat'] else None
+    chunk = (this_dem, this_dem_msk, this_dem_spat)
+    args_d = dict(args_d)
+    args_d['wg'] = this_wg
+
+    ## ==============================================
+    ## gererate the DEM (run the module)
+    ## ==============================================
+    #try:
+    out, status = _waffles_modules[this_wg['mod']][0](args_d)
+    #except KeyboardInterrupt as e:
+    #    echo_error_msg('killed by user, {}'.format(e))
+    #    sys.exit(-1)
+    #except Exception as e:
+    #    echo_error_msg('{}'.format(e))
+    #    status = -1
+
+    if status != 0: remove_glob(this_dem)
+    if not os.path.exists(this_dem): return(chunk + (-1,))
+    gdi = gdal_infos(this_dem, scan = True)
+    if gdi is not None:
+        if math.isnan(gdi['zr'][0]):
+            remove_glob(this_dem)
+            if this_wg['mask']: remove_glob(this_dem_msk)
+            return(chunk + (-1,))
+    else: return(chunk + (-1,))
+
+    gdal_set_epsg(this_dem, this_wg['epsg'])
+    waffles_gdal_md(this_wg)
+
+    ## ==============================================
+    ## optionally clip the DEM to polygon
+    ## ==============================================
+    if this_wg['clip'] is not None:
+        if this_wg['verbose']: echo_msg('clipping {}...'.format(this_dem))
+        clip_args = {}
+        cp = this_wg['clip'].split(':')
+        clip_args['src_ply'] = cp[0]
+        clip_args = args2dict(cp[1:], clip_args)
+        gdal_clip(this_dem, **clip_args)
+        if this_wg['mask']:
+            if this_wg['verbose']: echo_msg('clipping {}...'.format(this_dem_msk))
+            gdal_clip(this_dem_msk, **clip_args)
+
+        ## ==============================================
+        ## only re-scan the DEM if the clip changed it
+        ## ==============================================
+        if not os.path.exists(this_dem): return(chunk + (-1,))
+        gdi = gdal_infos(this_dem, scan = True)
+        if gdi is not None:
+            if math.isnan(gdi['zr'][0]):
+                remove_glob(this_dem)
+                if this_wg['mask']: remove_glob(this_dem_msk)
+                return(chunk + (-1,))
+        else: return(chunk + (-1,))
+
+    ## ==============================================
+    ## optionally filter the DEM 
+    ## ==============================================
+    if this_wg['fltr'] is not None:
+        if this_wg['verbose']: echo_msg('filtering {}...'.format(this_dem))
+        fltr_args = {}
+        fltr = this_wg['fltr'].split(':')
+        fltr_args['fltr'] = gmt_inc2inc(fltr[0])
+        fltr_args['use_gmt'] = True
+        fltr_args = args2dict(fltr[1:], fltr_args)        
+        if fltr_args['use_gmt']: fltr_args['use_gmt'] = True if this_wg['gc']['GMT'] is not None else False
+        try:
+            gdal_smooth(this_dem, '{}_s.tif'.format(this_wg['name']), **fltr_args)
+            os.rename('{}_s.tif'.format(this_wg['name']), this_dem)
+        except TypeError as e: echo_error_msg('{}'.format(e))
+
+    ## ==============================================
+    ## optionally resample the DEM 
+    ## ==============================================
+    if this_wg['sample'] is not None:
+        if this_wg['verbose']: echo_msg('resampling {}...'.format(this_dem))
+        if this_wg['gc']['GMT'] is not None:
+            gmt_sample_inc(this_dem, inc = this_wg['sample'], verbose = this_wg['verbose'])
+            if this_wg['mask']:
+                if this_wg['verbose']: echo_msg('resampling {}...'.format(this_dem_msk))
+                gmt_sample_inc(this_dem_msk, inc = this_wg['sample'], verbose = this_wg['verbose'])
+        else:
+            tmp_smp = '{}_smp.tif'.format(this_wg['name'])
+            for src_grd, rs in [[this_dem, 'bilinear'], [this_dem_msk, 'near']][:2 if this_wg['mask'] else 1]:
+                if this_wg['verbose']: echo_msg('resampling {}...'.format(src_grd))
+                out, status = run_cmd('gdalwarp -overwrite -tr {:.10f} {:.10f} {} -r {} -te {} {}\
+                '.format(this_wg['sample'], this_wg['sample'], src_grd, rs, region_format(waffles_proc_region(this_wg), 'te'), tmp_smp), verbose = this_wg['verbose'])
+                if status == 0: os.rename(tmp_smp, src_grd)
+                else: remove_glob(tmp_smp)
+
+    ## ==============================================
+    ## cut dem to final size - region buffered by (inc * extend)
+    ## ==============================================
+    tmp_cut = '{}_cut.tif'.format(this_wg['name'])
+    #try:
+    out = gdal_cut(this_dem, waffles_dist_region(this_wg), tmp_cut)
+    if out is not None: os.rename(tmp_cut, this_dem)
+    if this_wg['mask']:
+        out = gdal_cut(this_dem_msk, waffles_dist_region(this_wg), tmp_cut)
+        if out is not None: os.rename(tmp_cut, this_dem_msk)
+    #except OSError as e:
+    #    remove_glob(tmp_cut)
+    #    echo_error_msg('cut failed, is the dem open somewhere, {}'.format(e))
+    return(chunk + (0,))
+
 def waffles_run(wg = _waffles_grid_info):
     '''generate a DEM using wg dict settings
     see waffles_dict2wg() to generate a wg config.
@@ -3451,113 +4528,19 @@ def waffles_run(wg = _waffles_grid_info):
         s_regions = region_chunk(wg['region'], wg['inc'], (xcount/wg['chunk'])+1)
     else: s_regions = [wg['region']]
 
-    chunks = []
-    if wg['mask']: chunks_msk = []
-    if wg['spat']: chunks_spat = []
-    for region in s_regions:
-        this_wg = waffles_dict2wg(wg)
-        this_wg['region'] = region
-        this_wg['name'] = 'chunk_{}'.format(region_format(region, 'fn'))
-        this_dem = this_wg['name'] + '.tif'
-        chunks.append(this_dem)
-        if this_wg['mask']:
-            this_dem_msk = this_wg['name'] + '_msk.tif'
-            chunks_msk.append(this_dem_msk)
-        if this_wg['spat']: chunks_spat.append('{}_sm.shp'.format(this_wg['name']))
-        args_d['wg'] = this_wg
-
-        ## ==============================================
-        ## gererate the DEM (run the module)
-        ## ==============================================
-        #try:
-        out, status = _waffles_modules[this_wg['mod']][0](args_d)
-        #except KeyboardInterrupt as e:
-        #    echo_error_msg('killed by user, {}'.format(e))
-        #    sys.exit(-1)
-        #except Exception as e:
-        #    echo_error_msg('{}'.format(e))
-        #    status = -1
-
-        if status != 0: remove_glob(this_dem)
-        if not os.path.exists(this_dem): continue
-        gdi = gdal_infos(this_dem, scan = True)
-        if gdi is not None:
-            if np.isnan(gdi['zr'][0]):
-                remove_glob(this_dem)
-                if this_wg['mask']: remove_glob(this_dem_msk)
-                continue
-        else: continue
-
-        gdal_set_epsg(this_dem, this_wg['epsg'])
-        waffles_gdal_md(this_wg)
-
-        ## ==============================================
-        ## optionally clip the DEM to polygon
-        ## ==============================================
-        if this_wg['clip'] is not None:
-            if this_wg['verbose']: echo_msg('clipping {}...'.format(this_dem))
-            clip_args = {}
-            cp = this_wg['clip'].split(':')
-            clip_args['src_ply'] = cp[0]
-            clip_args = args2dict(cp[1:], clip_args)
-            gdal_clip(this_dem, **clip_args)
-            if this_wg['mask']:
-                if this_wg['verbose']: echo_msg('clipping {}...'.format(this_dem_msk))
-                gdal_clip(this_dem_msk, **clip_args)
-
-        if not os.path.exists(this_dem): continue
-        gdi = gdal_infos(this_dem, scan = True)
-        if gdi is not None:
-            if np.isnan(gdi['zr'][0]):
-                remove_glob(this_dem)
-                if this_wg['mask']: remove_glob(this_dem_msk)
-                continue
-        else: continue
-                
-        ## ==============================================
-        ## optionally filter the DEM 
-        ## ==============================================
-        if this_wg['fltr'] is not None:
-            if this_wg['verbose']: echo_msg('filtering {}...'.format(this_dem))
-            fltr_args = {}
-            fltr = this_wg['fltr'].split(':')
-            fltr_args['fltr'] = gmt_inc2inc(fltr[0])
-            fltr_args['use_gmt'] = True
-            fltr_args = args2dict(fltr[1:], fltr_args)        
-            if fltr_args['use_gmt']: fltr_args['use_gmt'] = True if this_wg['gc']['GMT'] is not None else False
-            try:
-                gdal_smooth(this_dem, 'tmp_s.tif', **fltr_args)
-                os.rename('tmp_s.tif', this_dem)
-            except TypeError as e: echo_error_msg('{}'.format(e))
-
-        ## ==============================================
-        ## optionally resample the DEM 
-        ## ==============================================
-        if this_wg['sample'] is not None:
-            if this_wg['verbose']: echo_msg('resampling {}...'.format(this_dem))
-            if this_wg['gc']['GMT'] is not None:
-                gmt_sample_inc(this_dem, inc = this_wg['sample'], verbose = this_wg['verbose'])
-                if this_wg['mask']:
-                    if this_wg['verbose']: echo_msg('resampling {}...'.format(this_dem_msk))
-                    gmt_sample_inc(this_dem_msk, inc = this_wg['sample'], verbose = this_wg['verbose'])
-            else:
-                out, status = run_cmd('gdalwarp -tr {:.10f} {:.10f} {} -r bilinear -te {} tmp.tif\
-                '.format(inc, inc, src_grd, region_format(waffles_proc_region(this_wg)), verbose = verbose))
-                if status == 0: os.rename('tmp.tif', '{}'.format(src_grd))
+    ## ==============================================
+    ## the chunks are independent; generate them in
+    ## parallel (unless this is already a parallel cli
+    ## region), then merge them below.
+    ## ==============================================
+    if _waffles_workers(len(s_regions)) > 1:
+        with concurrent.futures.ProcessPoolExecutor(max_workers = _waffles_workers(len(s_regions)), initializer = _waffles_worker_init) as executor:
+            s_chunks = list(executor.map(_waffles_run_chunk, s_regions, itertools.repeat(wg), itertools.repeat(args_d)))
+    else: s_chunks = [_waffles_run_chunk(s_region, wg, args_d) for s_region in s_regions]
+    chunks = [x[0] for x in s_chunks]
+    if wg['mask']: chunks_msk = [x[1] for x in s_chunks]
+    if wg['spat']: chunks_spat = [x[2] for x in s_chunks]
 
-        ## ==============================================
-        ## cut dem to final size - region buffered by (inc * extend)
-        ## ==============================================
-        #try:
-        out = gdal_cut(this_dem, waffles_dist_region(this_wg), 'tmp_cut.tif')
-        if out is not None: os.rename('tmp_cut.tif', this_dem)
-        if this_wg['mask']:
-            out = gdal_cut(this_dem_msk, waffles_dist_region(this_wg), 'tmp_cut.tif')
-            if out is not None: os.rename('tmp_cut.tif', this_dem_msk)
-        #except OSError as e:
-        #    remove_glob('tmp_cut.tif')
-        #    echo_error_msg('cut failed, is the dem open somewhere, {}'.format(e))                
-                
     ## ==============================================
     ## merge the chunks and remove
     ## ==============================================
@@ -3570,7 +4553,7 @@ def waffles_run(wg = _waffles_grid_info):
         if os.path.exists(chunks[0]):
             os.rename(chunks[0], dem)
 
-    if this_wg['mask']:
+    if wg['mask']:
         if len(chunks_msk) > 1:
             out, status = run_cmd('gdal_merge.py -n -9999 -a_nodata -9999 -ps {} -{} -ul_lr {} -o {} {}\
             '.format(wg['inc'], wg['inc'], waffles_dist_ul_lr(wg), dem_msk, ' '.join(chunks_msk)), verbose = True)
@@ -3580,7 +4563,7 @@ def waffles_run(wg = _waffles_grid_info):
             if os.path.exists(chunks_msk[0]):
                 os.rename(chunks_msk[0], dem_msk)
 
-    if this_wg['spat']:
+    if wg['spat']:
         if len(chunks_spat) > 1:
             out, status = run_cmd('ogrmerge.py {} {}'.format(dem_spat, ' '.join(chunks_spat)))
             [remove_glob('{}*'.format(x.split('.')[0])) for x in chunks_spat]
@@ -3642,7 +4625,7 @@ def waffles_run(wg = _waffles_grid_info):
 ## ==============================================
 ## waffles cli
 ## ==============================================
-waffles_cli_usage = '''waffles [OPTIONS] <datalist/entry>
+_waffles_cli_usage_fmt = '''waffles [OPTIONS] <datalist/entry>
 
 Generate DEMs and derivatives and process datalists.
 
@@ -3681,6 +4664,7 @@ General Options:
   -m, --mask\t\tGenerate a data mask raster.
   -s, --spat-meta\tGenerate spatial-metadata.
   -u, --uncert\t\tGenerate uncertainty grid.
+  -I, --index\t\tIndex the datalists (<datalist>.idx.sqlite) to speed up region queries.
 
   --help\t\tPrint the usage text
   --config\t\tSave the waffles config JSON and major datalist
@@ -3699,7 +4683,137 @@ Modules (see waffles --modules for more info):
   {}
 
 CIRES DEM home page: <http://ciresgroups.colorado.edu/coastalDEM>
-'''.format(_known_datalist_fmts_short_desc(), _waffles_module_short_desc(_waffles_modules))
+'''
+
+def _waffles_cli_usage():
+    '''returns the waffles cli usage text, formatted on first use'''
+
+    if 'usage' not in _waffles_usage_cache.keys():
+        _waffles_usage_cache['usage'] = _waffles_cli_usage_fmt.format(_known_datalist_fmts_short_desc(), _waffles_module_short_desc(_waffles_modules))
+    return(_waffles_usage_cache['usage'])
+
+def __getattr__(name):
+    '''the module-level `waffles_cli_usage` is formatted on access'''
+
+    if name == 'waffles_cli_usage': return(_waffles_cli_usage())
+    raise AttributeError('module {} has no attribute {}'.format(__name__, name))
+
+## ==============================================
+## waffles cli options; the option-strings and the
+## argparse keyword arguments for each option.
+## ==============================================
+_waffles_cli_opts = [
+    [['datalists'], {'nargs': '*'}],
+    [['-R', '--region'], {}],
+    [['-M', '--module'], {}],
+    [['-E', '--increment'], {'type': lambda s: s.split(':')}],
+    [['-O', '--outname'], {'dest': 'name'}],
+    [['-F', '--format'], {'dest': 'fmt'}],
+    [['-T', '--filter'], {'dest': 'fltr'}],
+    [['-X', '--extend'], {'type': lambda s: s.split(':')}],
+    [['-W', '--wg-config'], {'dest': 'wg_user'}],
+    [['-C', '--clip'], {}],
+    [['-K', '--chunk'], {}],
+    [['-P', '--epsg'], {}],
+    [['-Z', '--z-range', '--z-region'], {'dest': 'z_range', 'type': lambda s: s.split('/')}],
+    [['-w', '--weights'], {'action': 'store_true'}],
+    [['-p', '--prefix'], {'action': 'store_true'}],
+    [['-a', '--archive'], {'action': 'store_true'}],
+    [['-m', '--mask'], {'action': 'store_true'}],
+    [['-u', '--uncert'], {'action': 'store_true'}],
+    [['-s', '--spat-meta'], {'dest': 'spat', 'action': 'store_true'}],
+    [['-I', '--index'], {'action': 'store_true'}],
+    [['-r', '--grid-node'], {'action': 'store_true'}],
+    [['-V', '--verbose'], {'action': 'store_true'}],
+    [['--config'], {'action': 'store_true'}],
+    [['--modules'], {'action': 'store_true'}],
+    [['-h', '--help'], {'action': 'store_true'}],
+    [['-v', '--version'], {'action': 'store_true'}],
+]
+
+## ==============================================
+## the option-strings of the cli options which take a value
+## ==============================================
+_waffles_cli_val_opts = {x for opt in _waffles_cli_opts if 'action' not in opt[1].keys() and opt[0][0][0] == '-' for x in opt[0]}
+
+## ==============================================
+## parsed cli values to waffles_config values;
+## options not listed here and not in the config
+## are handled in waffles_cli.
+## `_waffles_cli_pair` sets the config `keys` from
+## a `val[:other-val]` option, converted with `t`.
+## ==============================================
+_waffles_cli_pair = lambda keys, t = str: lambda v: dict(zip(keys, [t(x) for x in v[:2]]))
+_waffles_cli_wg = {
+    'increment': _waffles_cli_pair(['inc', 'sample'], gmt_inc2inc),
+    'extend': _waffles_cli_pair(['extend', 'extend_proc']),
+    'z_range': lambda v: {'lower_limit': None if v[0] == '-' else float(v[0]), 'upper_limit': None if v[1] == '-' else float(v[1])} if len(v) > 1 else {},
+    'uncert': lambda v: {'mask': True, 'unc': True},
+    'grid_node': lambda v: {'node': 'grid'},
+}
+_waffles_cli_only = ['datalists', 'region', 'module', 'wg_user', 'prefix', 'config', 'modules', 'help', 'version']
+
+def waffles_wg_load(wg_fn):
+    '''load the waffles config json file `wg_fn`, using orjson
+    if it is available.
+
+    returns the waffles config dict'''
+
+    try:
+        import orjson
+        with open(wg_fn, 'rb') as wgj:
+            return(orjson.loads(wgj.read()))
+    except ImportError:
+        import json
+        with open(wg_fn, 'r') as wgj:
+            return(json.load(wgj))
+
+@functools.lru_cache(maxsize = 1)
+def _waffles_wg_encoder():
+    '''returns the json encoder for waffles configs, shared by all waffles_wg_dump calls;
+    it writes the same layout as the orjson options in waffles_wg_dump.'''
+
+    import json
+    return(json.JSONEncoder(indent = 2, sort_keys = True, ensure_ascii = False))
+
+def waffles_wg_dump(wg, wg_fn):
+    '''write the waffles config `wg` to the json file `wg_fn`, using
+    orjson if it is available (and can serialize `wg`).
+    either way the json is sorted and indented by 2 spaces (the only
+    indent orjson has).'''
+
+    try:
+        import orjson
+        wg_json = orjson.dumps(wg, option = orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+        with open(wg_fn, 'wb') as wgj:
+            wgj.write(wg_json)
+    except (ImportError, TypeError):
+        with open(wg_fn, 'w', encoding = 'utf-8') as wgj:
+            wgj.write(_waffles_wg_encoder().encode(wg))
+
+@functools.lru_cache(maxsize = 1)
+def _waffles_cli_parser():
+    '''returns the waffles cli argparse.ArgumentParser (see waffles_cli_usage)'''
+
+    import argparse
+    parser = argparse.ArgumentParser(prog = 'waffles', add_help = False, allow_abbrev = False)
+    for opt in _waffles_cli_opts: parser.add_argument(*opt[0], **opt[1])
+    return(parser)
+
+def _waffles_cli_argv(argv):
+    '''join the value options in `argv` to their values as `opt=val`,
+    so values such as -R -90/-89/25/26 are not taken as options.
+
+    returns the argv list'''
+
+    o_argv = []
+    argv = iter(argv)
+    for arg in argv:
+        if arg in _waffles_cli_val_opts:
+            val = next(argv, None)
+            o_argv.append(arg if val is None else '{}={}'.format(arg, val))
+        else: o_argv.append(arg)
+    return(o_argv)
 
 def waffles_cli(argv = sys.argv):
     '''run waffles from command-line
@@ -3710,122 +4824,64 @@ def waffles_cli(argv = sys.argv):
     by using a vector file as the -R option.)
     See `waffles_cli_usage` for full cli options.'''
     
-    wg = waffles_config()
-    wg_user = None
-    dls = []
-    region = None
-    module = None
-    want_prefix = False
-    want_verbose = False
-    want_config = False
+    ## ==============================================
+    ## print the modules, usage or version and exit
+    ## before doing anything else.
+    ## ==============================================
+    fast_args = set(argv[1:]) & {'--modules', '-h', '--help', '-v', '--version'}
+    if '--modules' in fast_args:
+        sys.stderr.write(_waffles_module_long_desc(_waffles_modules))
+        sys.exit(0)
+    elif '-h' in fast_args or '--help' in fast_args:
+        sys.stderr.write(_waffles_cli_usage())
+        sys.exit(0)
+    elif len(fast_args) > 0:
+        sys.stdout.write('{}\n'.format(_version))
+        sys.exit(0)
+    
     status = 0
-    i = 1
-    while i < len(argv):
-        arg = argv[i]
-        if arg == '--region' or arg == '-R':
-            region = str(argv[i + 1])
-            i += 1
-        elif arg[:2] == '-R': region = str(arg[2:])
-        elif arg == '--module' or arg == '-M':
-            module = str(argv[i + 1])
-            i += 1
-        elif arg[:2] == '-M': module = str(arg[2:])
-        elif arg == '--increment' or arg == '-E':
-            incs = argv[i + 1].split(':')
-            wg['inc'] = gmt_inc2inc(incs[0])
-            if len(incs) > 1: wg['sample'] = gmt_inc2inc(incs[1])
-            i = i + 1
-        elif arg[:2] == '-E':
-            incs = arg[2:].split(':')
-            wg['inc'] = gmt_inc2inc(arg[2:].split(':')[0])
-            if len(incs) > 1: wg['sample'] = gmt_inc2inc(incs[1])
-        elif arg == '--outname' or arg == '-O':
-            wg['name'] = argv[i + 1]
-            i += 1
-        elif arg[:2] == '-O': wg['name'] = arg[2:]
-        elif arg == '--format' or arg == '-F':
-            wg['fmt'] = argv[i + 1]
-            i += 1
-        elif arg[:2] == '-F': wg['fmt'] = arg[2:]
-        elif arg == '--filter' or arg == '-T':
-            wg['fltr'] = argv[i + 1]
-            i += 1
-        elif arg[:2] == '-T': wg['fltr'] = arg[2:]
-        elif arg == '--extend' or arg == '-X':
-            exts = argv[i + 1].split(':')
-            wg['extend'] = exts[0]
-            if len(exts) > 1: wg['extend_proc'] = exts[1]
-            i += 1
-        elif arg[:2] == '-X':
-            exts = arg[2:].split(':')
-            wg['extend'] = exts[0]
-            if len(exts) > 1: wg['extend_proc'] = exts[1]
-        elif arg == '--wg-config' or arg == '-W':
-            wg_user = argv[i + 1]
-            i += 1
-        elif arg[:2] == '-W': wg_user = arg[2:]
-        elif arg == '--clip' or arg == '-C':
-            wg['clip'] = argv[i + 1]
-            i = i + 1
-        elif arg[:2] == '-C': wg['clip'] = arg[2:]
-        elif arg == '--chunk' or arg == '-K':
-            wg['chunk'] = argv[i + 1]
-            i = i + 1
-        elif arg[:2] == '-K': wg['chunk'] = arg[2:]
-        elif arg == '--epsg' or arg == '-P':
-            wg['epsg'] = argv[i + 1]
-            i = i + 1
-        elif arg[:2] == '-P': wg['epsg'] = arg[2:]
-        elif arg == '--z-range' or arg == '-Z':
-            zr = argv[i + 1].split('/')
-            if len(zr) > 1:
-                wg['lower_limit'] = None if zr[0] == '-' else float(zr[0])
-                wg['upper_limit'] = None if zr[1] == '-' else float(zr[1])
-            i = i + 1
-        elif arg[:2] == '-Z':
-            zr = arg[2:].split('/')
-            if len(zr) > 1:
-                wg['lower_limit'] = None if zr[0] == '-' else float(zr[0])
-                wg['upper_limit'] = None if zr[1] == '-' else float(zr[1])
-        elif arg == '-w' or arg == '--weights': wg['weights'] = True
-        elif arg == '-p' or arg == '--prefix': want_prefix = True
-        elif arg == '-a' or arg == '--archive': wg['archive'] = True
-        elif arg == '-m' or arg == '--mask': wg['mask'] = True
-        elif arg == '-u' or arg == '--uncert':
-            wg['mask'] = True
-            wg['unc'] = True
-        elif arg == '-s' or arg == 'spat-meta': wg['spat'] = True
-        elif arg == '-r' or arg == '--grid-node': wg['node'] = 'grid'
-        elif arg == '--verbose' or arg == '-V': wg['verbose'] = True
-        elif arg == '--config': want_config = True
-        elif arg == '--modules' or arg == '-m':
-            sys.stderr.write(_waffles_module_long_desc(_waffles_modules))
-            sys.exit(0)
-        elif arg == '--help' or arg == '-h':
-            sys.stderr.write(waffles_cli_usage)
-            sys.exit(0)
-        elif arg == '--version' or arg == '-v':
-            sys.stdout.write('{}\n'.format(_version))
-            sys.exit(0)
-        else: dls.append(arg)
-        i += 1
+    parser = _waffles_cli_parser()
+    args, extra_args = parser.parse_known_args(_waffles_cli_argv(argv[1:]))
+    wg_user = args.wg_user
 
     ## ==============================================
-    ## load the user wg json and run waffles with that.
+    ## load the user wg json and run waffles with that;
+    ## the default config is only built otherwise.
     ## ==============================================
     if wg_user is not None:
-        if os.path.exists(wg_user):
+        try:
+            wg = waffles_wg_load(wg_user)
+        except FileNotFoundError:
+            echo_error_msg('specified json file does not exist, {}'.format(wg_user))
+            sys.exit(0)
+        except Exception as e:
+            wg = None
+            echo_error_msg(e)
+        if wg is not None:
             try:
-                with open(wg_user, 'r') as wgj:
-                    wg = json.load(wgj)
-                    dem = waffles_run(wg)
-                    sys.exit(0)
+                dem = waffles_run(wg)
+                sys.exit(0)
             except Exception as e:
-                wg = waffles_config()
                 echo_error_msg(e)
-        else:
-            echo_error_msg('specified json file does not exist, {}'.format(wg_user))
-            sys.exit(0)
+
+    ## ==============================================
+    ## every module but vdatum needs a datalist/entry
+    ## ==============================================
+    dls = args.datalists + extra_args
+    if len(dls) == 0 and (args.module is None or args.module.split(':')[0] != 'vdatum'):
+        sys.stderr.write(_waffles_cli_usage())
+        echo_error_msg('''must specify a datalist/entry, try gmrt or srtm for global data.''')
+        sys.exit(-1)
+    
+    wg = waffles_config()
+    for key, val in vars(args).items():
+        if val is None or val is False or key in _waffles_cli_only: continue
+        if key in _waffles_cli_wg.keys(): wg.update(_waffles_cli_wg[key](val))
+        elif key in wg.keys(): wg[key] = val
+    region = args.region
+    module = args.module
+    want_prefix = args.prefix
+    want_config = args.config
 
     ## ==============================================
     ## Otherwise run from cli options...
@@ -3845,12 +4901,6 @@ def waffles_cli(argv = sys.argv):
         wg['mod'] = mod
         wg['mod_args'] = mod_args
 
-    if wg['mod'] != 'vdatum':
-        if len(dls) == 0:
-            sys.stderr.write(waffles_cli_usage)
-            echo_error_msg('''must specify a datalist/entry, try gmrt or srtm for global data.''')
-            sys.exit(-1)
-            
     ## ==============================================
     ## set the datalists and names
     ## ==============================================
@@ -3860,31 +4910,57 @@ def waffles_cli(argv = sys.argv):
     ## reformat and set the region
     ## ==============================================
     if region is not None:
-        try:
-            these_regions = [[float(x) for x in region.split('/')]]
-        except ValueError: these_regions = gdal_ogr_regions(region)
-        except Exception as e:
-            echo_error_msg('failed to parse region(s), {}'.format(e))
+        r_parts = region.split('/')
+        if all([float_p(x) for x in r_parts]):
+            these_regions = [[float(x) for x in r_parts]]
+        else: these_regions = gdal_ogr_regions_cached(region)
     else: these_regions = [None]
     if len(these_regions) == 0: echo_error_msg('failed to parse region(s), {}'.format(region))
+
+    ## ==============================================
+    ## order many regions by zone (a band of 1000 cells)
+    ## then west edge, so that neighboring regions, which
+    ## read the same source data, are run together.
+    ## ==============================================
+    if len(these_regions) > 1:
+        zone_height = wg['inc'] * 1000 if wg['inc'] is not None else 1.
+        these_regions.sort(key = lambda r: (int(r[2] // zone_height), r[0]))
     if want_prefix or len(these_regions) > 1: wg['name_prefix'] = wg['name']
     
     ## ==============================================
-    ## run waffles for each input region.
+    ## run waffles for each input region; the regions
+    ## are independent, so when there are several, they
+    ## are run in parallel, each with a single worker.
+    ## ==============================================
+    if not want_config and len(these_regions) > 1:
+        wg_list = []
+        for this_region in these_regions:
+            this_wg = waffles_wg_copy(wg)
+            this_wg['region'] = this_region
+            wg_list.append(this_wg)
+        with concurrent.futures.ProcessPoolExecutor(max_workers = _waffles_workers(len(these_regions)), initializer = _waffles_worker_init) as executor:
+            dems = list(executor.map(waffles_run, wg_list))
+        these_regions = []
+
+    ## ==============================================
+    ## the --config messages are gathered and written
+    ## to stderr in one go after the loop. the config
+    ## is validated once; each region then only sets
+    ## its region-dependent values.
     ## ==============================================
-    bn = wg['name']
+    cfg_msgs = []
+    if want_config: base_wg = _waffles_wg_validate(wg)
     for this_region in these_regions:
         wg['region'] = this_region
         
         if want_config:
-            this_wg = waffles_dict2wg(wg)
+            this_wg = _waffles_wg_set_region(base_wg, this_region)
             if this_wg is not None:
                 #echo_msg(json.dumps(this_wg, indent = 4, sort_keys = True))
-                echo_msg(this_wg)
-                with open('{}.json'.format(this_wg['name']), 'w') as wg_json:
-                    echo_msg('generating waffles config file: {}.json'.format(this_wg['name']))
-                    echo_msg('generating major datalist: {}_mjr.datalist'.format(this_wg['name']))
-                    wg_json.write(json.dumps(this_wg, indent = 4, sort_keys = True))
+                cfg_msgs.append(this_wg)
+                cfg_msgs.append('generating waffles config file: {}.json'.format(this_wg['name']))
+                cfg_msgs.append('generating major datalist: {}_mjr.datalist'.format(this_wg['name']))
+                waffles_wg_dump(this_wg, '{}.json'.format(this_wg['name']))
             else: echo_error_msg('could not parse config.')
         else:
             ## ==============================================
@@ -3911,6 +4987,8 @@ def waffles_cli(argv = sys.argv):
             em = waffles_run(wg)
             #except RuntimeError or OSError as e:
             #    echo_error_msg('Cannot access {}.tif, may be in use elsewhere, {}'.format(wg['name'], e))
+    if len(cfg_msgs) > 0:
+        echo_msg(cfg_msgs)
 
 ## ==============================================
 ## mainline -- run waffles directly...
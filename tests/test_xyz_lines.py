@@ -0,0 +1,55 @@
+### test_xyz_lines.py
+##
+## the batched xyz writer (xyz_lines) should write
+## the same text as xyz_line does for each line.
+##
+## run with `python -m unittest discover tests`
+##
+### Code:
+import io
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'geomods'))
+try:
+    import numpy as np
+    import waffles
+except ImportError:
+    waffles = None
+
+def _xyz_line_text(xyzs):
+    '''returns the text of xyz_line on each of `xyzs`'''
+
+    out = io.StringIO()
+    for xyz in xyzs: waffles.xyz_line(xyz, out)
+    return(out.getvalue())
+
+def _xyz_lines_text(xyzs, batch = 16384):
+    '''returns the text of xyz_lines on `xyzs`'''
+
+    out = io.StringIO()
+    waffles.xyz_lines(xyzs, out, batch = batch)
+    return(out.getvalue())
+
+@unittest.skipIf(waffles is None, 'waffles requires numpy and gdal')
+class TestXYZLines(unittest.TestCase):
+
+    def test_float32_str(self):
+        xyzs = [[np.float32(1.1), np.float32(2.2), np.float32(-3.3)]]
+        self.assertEqual(_xyz_lines_text(xyzs), '1.1 2.2 -3.3\n')
+        self.assertEqual(_xyz_line_text(xyzs), '1.1 2.2 -3.3\n')
+
+    def test_float32_array_rows(self):
+        xyzs = list(np.array([[-90.5, 25.25, -12.1], [-90.25, 25.5, 4.7]], dtype = np.float32))
+        self.assertEqual(_xyz_lines_text(xyzs), _xyz_line_text(xyzs))
+        self.assertEqual(_xyz_lines_text(xyzs), ''.join(['{}\n'.format(' '.join([str(x) for x in xyz])) for xyz in xyzs]))
+
+    def test_ragged_batches(self):
+        xyzs = [[1.5, 2.5, 3.5], [4.5, 5.5, 6.5, 1], [np.float64(7.25), 8, np.float32(9.1)]]
+        self.assertEqual(_xyz_lines_text(xyzs, batch = 2), _xyz_line_text(xyzs))
+
+if __name__ == '__main__':
+    unittest.main()
+
+### End